@@ -0,0 +1,244 @@
+#!./bin/python3
+import os
+import sys
+import time
+import json
+import shutil
+import tempfile
+import argparse
+import resource
+import tracemalloc
+import importlib.util
+from datetime import datetime, timedelta
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# powermetrics-parse.py can't be imported by name because of the dash. It is loaded at import time (and not in main)
+# so the parse workers, which import this file again when processes are spawned instead of forked, find it too
+scriptFolder = os.path.dirname(os.path.abspath(__file__))
+parseSpec = importlib.util.spec_from_file_location("powermetricsParse", os.path.join(scriptFolder, "powermetrics-parse.py"))
+pm = importlib.util.module_from_spec(parseSpec)
+sys.modules[parseSpec.name] = pm
+parseSpec.loader.exec_module(pm)
+
+# The synthetic logs are named like the logs in powermetric-logs so the chart groups find their video types
+defaultLogNames = sorted(os.listdir(os.path.join(scriptFolder, "powermetric-logs"))) if os.path.isdir(os.path.join(scriptFolder, "powermetric-logs")) else []
+
+def histogramText(frequencies, residencies):
+    # " (600 MHz: 1.0% 972 MHz:  92% ...)" like powermetrics prints it
+    return " (" + " ".join(f"{frequency} MHz: {residency:4.2g}%" for frequency, residency in zip(frequencies, residencies)) + ")"
+
+def splitResidency(rng, active, bins):
+    # Random split of the active residency over the DVFS bins
+    weights = rng.dirichlet(np.full(bins, 0.5))
+    return weights * active
+
+def generateLog(path, samples, cores, bins, seed=0):
+    # A powermetrics text log shaped like the ones in powermetric-logs: idle, then a workload, then idle again,
+    # the first half of the cores in the E-Cluster and the other half in the P-Cluster
+    rng = np.random.default_rng(seed)
+    eCores = max(cores // 2, 1)
+    eFrequencies = np.linspace(600, 2064, bins).astype(int)
+    pFrequencies = np.linspace(600, 3204, bins).astype(int)
+    gpuFrequencies = np.linspace(396, 1278, bins).astype(int)
+    start = datetime(2021, 2, 11, 0, 35, 43)
+    elapsed = 0.0
+
+    with open(path, 'w') as log:
+        log.write("Machine model: Macmini9,1\nOS version: 20D74\nBoot arguments: \nBoot time: Thu Feb 11 00:07:11 2021\n\n\n\n")
+        for sample in range(samples):
+            load = 1.0 if samples // 5 <= sample < samples * 4 // 5 else 0.1
+            sampleMs = 1000 + rng.uniform(0, 15)
+            elapsed += sampleMs
+            timestamp = (start + timedelta(milliseconds=elapsed)).strftime("%a %b %d %H:%M:%S %Y")
+            lines = [f"*** Sampled system activity ({timestamp} -0800) ({sampleMs:.2f}ms elapsed) ***\n\n\n**** Processor usage ****\n"]
+
+            power = {}
+            for cluster, clusterCores, frequencies in (('E', range(eCores), eFrequencies), ('P', range(eCores, cores), pFrequencies)):
+                active = min(100.0, rng.uniform(40, 90) * load)
+                power[cluster] = int(rng.uniform(20, 60) + active * (6 if cluster == 'E' else 40))
+                residencies = splitResidency(rng, 100.0, bins)
+                lines.append(f"{cluster}-Cluster Power: {power[cluster]} mW")
+                lines.append(f"{cluster}-Cluster HW active frequency: {int(np.dot(frequencies, residencies) / 100)} MHz")
+                lines.append(f"{cluster}-Cluster HW active residency: {active:6.2f}%" + histogramText(frequencies, residencies))
+                lines.append(f"{cluster}-Cluster idle residency: {100 - active:6.2f}%")
+                for core in clusterCores:
+                    coreActive = min(100.0, active * rng.uniform(0.5, 1.2))
+                    coreResidencies = splitResidency(rng, coreActive, bins)
+                    lines.append(f"cpu {core} frequency: {int(rng.choice(frequencies))} MHz")
+                    lines.append(f"cpu {core} idle residency: {100 - coreActive:6.2f}%")
+                    lines.append(f"cpu {core} active residency: {coreActive:6.2f}%" + histogramText(frequencies, coreResidencies))
+                lines.append("")
+
+            gpuActive = min(100.0, rng.uniform(5, 60) * load)
+            gpuPower = int(gpuActive * 20)
+            dramPower = int(rng.uniform(10, 40) + 60 * load)
+            lines.append("ANE Power: 0 mW")
+            lines.append(f"DRAM Power: {dramPower} mW")
+            lines.append(f"Clusters Total Power: {power['E'] + power['P']} mW")
+            lines.append(f"GPU Power: {gpuPower} mW")
+            lines.append(f"Package Power: {power['E'] + power['P'] + dramPower + gpuPower + int(rng.uniform(0, 20))} mW")
+            lines.append("\n**** GPU usage ****\n")
+            gpuResidencies = splitResidency(rng, gpuActive, bins)
+            lines.append(f"GPU active frequency: {int(np.dot(gpuFrequencies, gpuResidencies) / max(gpuActive, 1e-3))} MHz")
+            lines.append(f"GPU active residency: {gpuActive:6.2f}%" + histogramText(gpuFrequencies, gpuResidencies))
+            lines.append("GPU requested frequency:" + histogramText(gpuFrequencies, gpuResidencies))
+            lines.append(f"GPU idle residency: {100 - gpuActive:6.2f}%")
+            lines.append(f"GPU Power: {gpuPower} mW\n\n")
+            log.write("\n".join(lines) + "\n")
+
+def generateCorpus(folder, files, samples, cores, bins):
+    # One log per file name, each with its own seed so the runs differ
+    os.makedirs(folder, exist_ok=True)
+    names = (defaultLogNames + [f"Synthetic-{index}.txt" for index in range(files)])[:files]
+    for seed, name in enumerate(names):
+        generateLog(os.path.join(folder, name), samples, cores, bins, seed)
+    return sum(os.path.getsize(os.path.join(folder, name)) for name in names)
+
+def peakRssMB():
+    # Highest resident size so far of this process or of any of its finished children (the parse and render workers).
+    # It never goes down, so a stage reports the peak of every stage before it too. ru_maxrss is in kilobytes on Linux
+    # and in bytes on macOS
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+def hasImageRenderer():
+    try:
+        import kaleido
+    except ImportError:
+        return False
+    return True
+
+def runScale(scale, args):
+    # Generate the corpus of one scale and time every stage of the pipeline on it. Runs in its own process so the
+    # peak memory of one scale doesn't carry over to the next
+    workFolder = os.path.join(args.work_folder, f"{scale}x")
+    logsFolder = os.path.join(workFolder, "powermetric-logs") + '/'
+    shutil.rmtree(workFolder, ignore_errors=True)
+    logBytes = generateCorpus(logsFolder, args.files, args.samples * scale, args.cores, args.bins)
+    os.makedirs(os.path.join(workFolder, "outputs"))
+    shutil.copy(os.path.join(scriptFolder, "favicon-97x98-white.png"), workFolder)
+    os.chdir(workFolder)
+
+    results = []
+    state = {'samples': args.files * args.samples * scale}
+    if args.trace_memory:
+        tracemalloc.start()
+
+    def timeStage(name, run):
+        if args.trace_memory:
+            tracemalloc.reset_peak()
+        start = time.perf_counter()
+        run()
+        seconds = time.perf_counter() - start
+        result = {'scale': scale, 'stage': name, 'seconds': seconds, 'samples': state['samples'],
+            'samplesPerSecond': state['samples'] / seconds if seconds else None, 'mbPerSecond': logBytes / 1024 / 1024 / seconds if seconds else None,
+            'cumulativePeakRssMB': peakRssMB()}
+        if args.trace_memory:
+            # Peak since reset_peak at the start of the stage, so this one is the stage's own
+            result['peakHeapMB'] = tracemalloc.get_traced_memory()[1] / 1024 / 1024
+        results.append(result)
+
+    def parse():
+        state['dfSamples'], state['dfSampleTimes'], state['dfSummary'], coreArray, histograms = pm.loadLogs(logsFolder, args.workers)
+        state['dfCores'] = pm.coreFrame(coreArray, state['dfSampleTimes'])
+        state['dfTimeInState'] = pm.timeInStateTable(histograms, state['dfSampleTimes'])
+        state['dfWeighted'] = pm.weightedFrequencies(histograms, state['dfSampleTimes'])
+    timeStage('parse', parse)
+
+    def aggregate():
+        dfPower, dfFrequency, dfUsage = (pm.sampleView(state['dfSamples'], state['dfSampleTimes'], metric) for metric in pm.sampleMetrics)
+        dfPower['phase'] = dfFrequency['phase'] = dfUsage['phase'] = pm.segmentPhases(dfPower)
+        state['frames'] = dfPower, dfFrequency, dfUsage
+        state['dfPhases'] = pm.phaseStats(dfPower)
+        state['dfWorkload'] = pm.workloadEnergy(dfPower, pm.workloadWindows(dfPower))
+    timeStage('aggregate', aggregate)
+
+    # Figures and html first, then the static images on their own since they need Kaleido
+    def render():
+        config = {'modeBarButtonsToRemove': ['toggleSpikelines', 'hoverClosestCartesian', 'hoverCompareCartesian', 'select2d', 'lasso2d'], 'displaylogo': False}
+        frames = dict(zip(pm.sampleMetrics, state['frames']))
+        from PIL import Image
+        kLogo = Image.open("favicon-97x98-white.png")
+        state['imageJobs'] = [job for group in pm.chartGroups for job in pm.buildChartGroup(group, frames, config, kLogo)[0]]
+    timeStage('render', render)
+
+    if args.images and hasImageRenderer():
+        timeStage('images', lambda: pm.exportImages(state['imageJobs'], args.workers))
+
+    def export():
+        pm.exportResults(pm.exportTables(state['dfSamples'], state['dfSampleTimes'], *state['frames'], state['dfSummary'], state['dfWorkload'], state['dfPhases'],
+            state['dfCores'], state['dfTimeInState'], state['dfWeighted']), args.export)
+    timeStage('export', export)
+
+    os.chdir(scriptFolder)
+    if not args.keep:
+        shutil.rmtree(workFolder, ignore_errors=True)
+    for result in results:
+        result['logMB'] = logBytes / 1024 / 1024
+    return results
+
+def compareBaseline(results, baseline, tolerance):
+    # Stages that got slower than the baseline by more than the tolerance, for the scales both runs have
+    baselineSeconds = {(result['scale'], result['stage']): result['seconds'] for result in baseline['results']}
+    regressions = []
+    for result in results:
+        before = baselineSeconds.get((result['scale'], result['stage']))
+        if before and result['seconds'] > before * (1 + tolerance):
+            regressions.append(f"{result['stage']} at {result['scale']}x: {before:.2f} s -> {result['seconds']:.2f} s (+{result['seconds'] / before - 1:.0%})")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the parse, aggregate, render and export stages of powermetrics-parse.py on synthetic logs")
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help="Corpus sizes to run, as multiples of the samples per file (default: 1 10 100)")
+    parser.add_argument('--files', type=int, default=len(defaultLogNames) or 15, help="Number of logs in the corpus (default: the number of logs in powermetric-logs)")
+    parser.add_argument('--samples', type=int, default=250, help="Samples per log at 1x (default: 250)")
+    parser.add_argument('--cores', type=int, default=8, help="CPU cores per sample, half in each cluster (default: 8)")
+    parser.add_argument('--bins', type=int, default=15, help="DVFS frequency bins of every residency histogram (default: 15)")
+    parser.add_argument('--workers', type=int, default=1, help="Number of parse and image export processes (default: 1)")
+    parser.add_argument('--export', nargs='+', choices=sorted(pm.exporters), default=['feather'], help="Export formats timed by the export stage (default: feather)")
+    parser.add_argument('--images', action='store_true', help="Also time the static image export, needs Kaleido")
+    parser.add_argument('--trace-memory', action=argparse.BooleanOptionalAction, default=True,
+        help="Report the peak Python and NumPy heap of every stage on its own with tracemalloc. It slows the stages down, "
+            "time them with --no-trace-memory. Allocations of --workers processes are not traced (default: on)")
+    parser.add_argument('--work-folder', default=os.path.join(tempfile.gettempdir(), "powermetrics-benchmark"), help="Folder the corpora and the outputs are written to")
+    parser.add_argument('--keep', action='store_true', help="Keep the generated logs and outputs of every scale")
+    parser.add_argument('--json', metavar='PATH', help="Write the results to a JSON file, to be used as a baseline later")
+    parser.add_argument('--baseline', metavar='PATH', help="JSON results of an earlier run, exit with an error if a stage got slower")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="Slowdown against the baseline tolerated before failing (default: 0.2 = 20%%)")
+    args = parser.parse_args()
+    args.work_folder = os.path.abspath(args.work_folder)
+
+    if args.images and not hasImageRenderer():
+        print("Kaleido is not installed, the images stage is skipped")
+
+    results = []
+    for scale in args.scales:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            results += pool.submit(runScale, scale, args).result()
+
+    # The heap peak is the stage's own, the RSS one is the highest of this stage and every stage before it
+    print(f"{'scale':>6} {'stage':<10} {'seconds':>9} {'samples/s':>11} {'MB/s':>8}" + (f" {'peak heap MB':>13}" if args.trace_memory else "") + f" {'cumulative peak RSS MB':>23}")
+    for result in results:
+        print(f"{str(result['scale']) + 'x':>6} {result['stage']:<10} {result['seconds']:9.2f} {result['samplesPerSecond']:11.0f} {result['mbPerSecond']:8.1f}"
+            + (f" {result['peakHeapMB']:13.0f}" if args.trace_memory else "") + f" {result['cumulativePeakRssMB']:23.0f}")
+
+    if args.json:
+        settings = {key: value for key, value in vars(args).items() if key not in ('json', 'baseline', 'work_folder')}
+        pm.storeJson(args.json, {'settings': settings, 'python': sys.version.split()[0], 'results': results})
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        # tracemalloc slows every stage down, times taken with and without it don't compare
+        if baseline['settings'].get('trace_memory', False) != args.trace_memory:
+            print("The baseline was timed with a different --trace-memory setting, its times don't compare with these")
+        regressions = compareBaseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print("Slower than the baseline:", regression)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
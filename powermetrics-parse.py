@@ -1,39 +1,347 @@
 #!./bin/python3
 import os
-import subprocess
 import re
-import csv
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import plotly.io as pio
 import pandas as pd
 import numpy as np
 import time
-import plotly.figure_factory as ff
-from PIL import Image
-
-def regexParse(content, videoType):
-    # Declare local dataframes
-    dfPower, dfFrequency, dfUsage = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-
-    # Regex findall returns matches which are all strings
-    # Used list(map(int, regexMatches))) to convert the list of strings to a list of int or float so that in Excel it's an integer
-    dfPower['Efficiency Cluster'] = pd.Series(map(int, re.findall(r'E-Cluster Power:\s*([\d.]+)\s*mW', content)))
-    dfFrequency['Efficiency Cluster'] = pd.Series(map(int, re.findall(r'E-Cluster HW active frequency:\s*([\d.]+)\s*MHz', content)))
-    dfUsage['Efficiency Cluster'] = pd.Series(map(float, re.findall(r'E-Cluster HW active residency:\s*([\d.]+)%', content)))
-
-    dfPower['Performance Cluster'] = pd.Series(map(int, re.findall(r'P-Cluster Power:\s*([\d.]+)\s*mW', content)))
-    dfFrequency['Performance Cluster'] = pd.Series(map(int, re.findall(r'P-Cluster HW active frequency:\s*([\d.]+)\s*MHz', content)))
-    dfUsage['Performance Cluster'] = pd.Series(map(float, re.findall(r'P-Cluster HW active residency:\s*([\d.]+)%', content)))
-
-    dfPower['DRAM'] = pd.Series(map(int, re.findall(r'DRAM Power:\s*([\d.]+)\s*mW', content)))
-    dfPower['Cluster'] = pd.Series(map(int, re.findall(r'Clusters Total Power:\s*([\d.]+)\s*mW', content)))
-    dfPower['Package'] = pd.Series(map(int, re.findall(r'Package Power:\s*([\d.]+)\s*mW', content)))
-
-    dfPower['GPU'] = pd.Series(map(int, re.findall(r'GPU Power:\s*([\d.]+)\s*mW\nPackage Power', content)))
-    dfFrequency['GPU'] = pd.Series(map(int, re.findall(r'GPU active frequency:\s*([\d.]+)\s*MHz', content)))
-    dfUsage['GPU'] = pd.Series(map(float, re.findall(r'GPU active residency:\s*([\d.]+)%', content)))
+import tracemalloc
+import contextlib
+import itertools
+from datetime import datetime, timezone
+import plistlib
+import codecs
+import argparse
+import hashlib
+import zipfile
+import mmap
+import fnmatch
+import shutil
+import json
+import sqlite3
+import html
+from string import Template
+from concurrent.futures import ProcessPoolExecutor
+
+# Plotly, Kaleido and PIL take longer to import than parsing a few logs. They are imported by the functions that
+# draw and write the charts, so the parse, summarize and export commands never load them
+
+# Every metric line inside a powermetrics text sample looks like "<label>: <value><unit> ...".
+# Map each label we care about to the converter for its leading value so a whole sample can be
+# parsed with a single dict lookup per line instead of one regex scan of the file per metric
+sampleFields = {
+    'E-Cluster Power': int,
+    'E-Cluster HW active frequency': int,
+    'E-Cluster HW active residency': float,
+    'P-Cluster Power': int,
+    'P-Cluster HW active frequency': int,
+    'P-Cluster HW active residency': float,
+    'DRAM Power': int,
+    'Clusters Total Power': int,
+    'GPU Power': int,
+    'Package Power': int,
+    'GPU active frequency': int,
+    'GPU active residency': float,
+}
+
+# Bump whenever the parser output changes so logs cached by an older parser are parsed again
+parserVersion = 7
+
+# Chart column name -> powermetrics label, one map per output dataframe
+powerColumns = {
+    'Efficiency Cluster': 'E-Cluster Power',
+    'Performance Cluster': 'P-Cluster Power',
+    'DRAM': 'DRAM Power',
+    'Cluster': 'Clusters Total Power',
+    'Package': 'Package Power',
+    'GPU': 'GPU Power',
+}
+frequencyColumns = {
+    'Efficiency Cluster': 'E-Cluster HW active frequency',
+    'Performance Cluster': 'P-Cluster HW active frequency',
+    'GPU': 'GPU active frequency',
+}
+usageColumns = {
+    'Efficiency Cluster': 'E-Cluster HW active residency',
+    'Performance Cluster': 'P-Cluster HW active residency',
+    'GPU': 'GPU active residency',
+}
+
+# Per core lines look like "cpu 4 active residency:  32.14% (600 MHz: ...)". Their values are kept in a
+# (samples x cores x coreMetrics) float32 array instead of 24 more dataframe columns
+coreMetrics = ['frequency', 'idle residency', 'active residency']
+coreMetricIndex = {metric: index for index, metric in enumerate(coreMetrics)}
+
+# Lines that end with a DVFS residency histogram, e.g.
+#   P-Cluster HW active residency:  81.52% (600 MHz:  18% 828 MHz: .02% ... 3204 MHz:  79%)
+# mapped to the histogram name they are stored under. "cpu N active residency" lines are stored as "cpu N"
+histogramLabels = {
+    'E-Cluster HW active residency': 'E-Cluster',
+    'P-Cluster HW active residency': 'P-Cluster',
+    'GPU active residency': 'GPU',
+    'GPU requested frequency': 'GPU requested',
+}
+
+# The cluster histograms are a split of the active time only, unlike the core and GPU ones which are
+# a split of the whole sample. Scale them by the cluster active residency so they all mean the same thing
+clusterActiveLabels = {
+    'E-Cluster': 'E-Cluster HW active residency',
+    'P-Cluster': 'P-Cluster HW active residency',
+}
+
+def parseHistogram(rest):
+    # "(600 MHz:  18% 828 MHz: .02% ...)" -> ((600, 828, ...), [18.0, 0.02, ...]) with a single split,
+    # every bin is always the three tokens "<frequency> MHz: <residency>%"
+    start = rest.find('(')
+    end = rest.rfind(')')
+    # A line cut short (a log still being written) has no closing parenthesis
+    if start < 0 or end < start:
+        return None
+    tokens = rest[start + 1:end].split()
+    return tuple(map(int, tokens[0::3])), [float(value.rstrip('%')) for value in tokens[2::3]]
+
+# e.g. *** Sampled system activity (Mon Mar  1 10:44:49 2021 -0800) (1004.80ms elapsed) ***
+sampleHeaderRegex = re.compile(r'\((.+?)\) \(([\d.]+)ms elapsed\)')
+
+def parseSampleHeader(line):
+    # Returns the block kind, the wall clock time (epoch seconds) and the real length of the sample (ms).
+    # The last block of a log is "*** Summary system activity ... ***" which averages the whole run
+    header = {'kind': 'summary' if line.startswith('*** Summary') else 'sampled'}
+    match = sampleHeaderRegex.search(line)
+    if match is not None:
+        header['timestamp'] = datetime.strptime(match.group(1), '%a %b %d %H:%M:%S %Y %z').timestamp()
+        header['elapsed'] = float(match.group(2))
+    return header
+
+def streamSamples(lines):
+    # Walk the log once, line by line, and yield one dict of typed values per
+    # "*** Sampled/Summary system activity ... ***" block. Only the current sample is held in memory
+    # so this works on an open file object of any size as well as on a list of lines
+    sample = None
+    for line in lines:
+        if line.startswith('*** '):
+            if sample:
+                yield sample
+            sample = parseSampleHeader(line)
+            continue
+
+        # Anything before the first header is the run metadata (machine model, OS version...)
+        if sample is None:
+            continue
+
+        label, separator, rest = line.partition(':')
+        convert = sampleFields.get(label)
+
+        histogram = histogramLabels.get(label)
+
+        if convert is not None:
+            # "GPU Power" is reported twice per sample with the same value, keep the first one
+            if label not in sample:
+                sample[label] = convert(rest.split(None, 1)[0].rstrip('%'))
+        elif label.startswith('cpu '):
+            core, _, metric = label[4:].partition(' ')
+            metricIndex = coreMetricIndex.get(metric)
+            if metricIndex is not None:
+                if 'cores' not in sample:
+                    sample['cores'] = {}
+                if core not in sample['cores']:
+                    sample['cores'][core] = [np.nan] * len(coreMetrics)
+                sample['cores'][core][metricIndex] = float(rest.split(None, 1)[0].rstrip('%'))
+            if metric == 'active residency':
+                histogram = 'cpu ' + core
+
+        if histogram is not None:
+            if 'histograms' not in sample:
+                sample['histograms'] = {}
+            sample['histograms'][histogram] = parseHistogram(rest)
+
+    if sample:
+        yield sample
+
+# Byte patterns of the lines scanTextLog reads straight out of a memory mapped text log
+sampleHeaderBytesRegex = re.compile(rb'^\*\*\* [^\n]*', re.M)
+sampleFieldBytesRegex = re.compile(rb'^(' + b'|'.join(re.escape(label.encode()) for label in sampleFields) + rb'):[ \t]*([^\s%]+)', re.M)
+coreBytesRegex = re.compile(rb'^cpu (\d+) (' + b'|'.join(metric.encode() for metric in coreMetrics) + rb'):[ \t]*([^\s%]+)([^\n]*)', re.M)
+histogramBytesRegex = re.compile(rb'^(' + b'|'.join(re.escape(label.encode()) for label in histogramLabels) + rb'):([^\n]*)', re.M)
+sampleFieldIndex = {label.encode(): index for index, label in enumerate(sampleFields)}
+coreMetricBytesIndex = {metric.encode(): index for index, metric in enumerate(coreMetrics)}
+
+def parseHistogramBytes(rest):
+    # parseHistogram for a line of bytes
+    start = rest.find(b'(')
+    end = rest.rfind(b')')
+    if start < 0 or end < start:
+        return None
+    tokens = rest[start + 1:end].split()
+    return tuple(map(int, tokens[0::3])), [float(value.rstrip(b'%')) for value in tokens[2::3]]
+
+def scanTextLog(path, videoType, blocksPerWindow=4096):
+    # Same frames as buildFrames(streamSamples(...)) for a text log, scanned as bytes from a memory map.
+    # One pass finds the sample headers so every output array is allocated at its final size, then the
+    # metric lines are matched window by window (a few thousand samples at a time) and their numbers decoded
+    # straight from bytes into the arrays. Peak memory follows the output, not the size of the log
+    if os.path.getsize(path) == 0:
+        return buildFrames(iter(()), videoType)
+
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as log:
+        with traceStage('scan headers'):
+            headers = [(match.start(), parseSampleHeader(match.group().decode('utf8', 'ignore'))) for match in sampleHeaderBytesRegex.finditer(log)]
+        starts = np.array([start for start, _ in headers], dtype=np.int64)
+        headers = [header for _, header in headers]
+        blockCount = len(headers)
+
+        # Per block arrays, the summary blocks are split off at the end. Rows of coreArray and of the
+        # histograms are the sampled blocks only, like the rows of the frames
+        sampled = np.array([header['kind'] != 'summary' for header in headers], dtype=bool)
+        rowOfBlock = np.cumsum(sampled) - 1
+        rowCount = int(sampled.sum())
+        fields = np.full((len(sampleFields), blockCount), np.nan)
+        coreArray = np.full((rowCount, 0, len(coreMetrics)), np.nan, dtype=np.float32)
+        histograms = {}
+
+        for first in range(0, blockCount, blocksPerWindow):
+            windowStart = starts[first]
+            windowEnd = starts[first + blocksPerWindow] if first + blocksPerWindow < blockCount else len(log)
+            windowStarts = starts[first:first + blocksPerWindow]
+
+            with traceStage('sample fields', window=first // blocksPerWindow):
+                matches = [(match.start(), sampleFieldIndex[match.group(1)], float(match.group(2)))
+                    for match in sampleFieldBytesRegex.finditer(log, windowStart, windowEnd)]
+                if matches:
+                    positions, labels, values = (np.array(column) for column in zip(*matches))
+                    blocks = first + np.searchsorted(windowStarts, positions, side='right') - 1
+                    # "GPU Power" is reported twice per sample with the same value, keep the first one
+                    _, firstMatches = np.unique(labels * blockCount + blocks, return_index=True)
+                    fields[labels[firstMatches], blocks[firstMatches]] = values[firstMatches]
+
+            with traceStage('core lines', window=first // blocksPerWindow):
+                matches = []
+                coreHistogramMatches = []
+                for match in coreBytesRegex.finditer(log, windowStart, windowEnd):
+                    matches.append((match.start(), int(match.group(1)), coreMetricBytesIndex[match.group(2)], float(match.group(3))))
+                    if match.group(2) == b'active residency':
+                        coreHistogramMatches.append((match.start(), 'cpu ' + match.group(1).decode(), match.group(4)))
+                if matches:
+                    positions, cores, metrics, values = (np.array(column) for column in zip(*matches))
+                    blocks = first + np.searchsorted(windowStarts, positions, side='right') - 1
+                    keep = sampled[blocks]
+                    if cores.max() >= coreArray.shape[1]:
+                        coreArray = np.pad(coreArray, ((0, 0), (0, cores.max() + 1 - coreArray.shape[1]), (0, 0)), constant_values=np.nan)
+                    coreArray[rowOfBlock[blocks[keep]], cores[keep], metrics[keep]] = values[keep]
+
+            with traceStage('histograms', window=first // blocksPerWindow):
+                # Histograms are added in line order so they come out in the same order as with the text parser
+                histogramMatches = [(match.start(), histogramLabels[match.group(1).decode()], match.group(2))
+                    for match in histogramBytesRegex.finditer(log, windowStart, windowEnd)] + coreHistogramMatches
+                histogramMatches.sort()
+                blocks = first + np.searchsorted(windowStarts, [position for position, _, _ in histogramMatches], side='right') - 1
+                for block, (_, name, rest) in zip(blocks, histogramMatches):
+                    if sampled[block]:
+                        if name not in histograms:
+                            histograms[name] = HistogramBuilder(rowCount)
+                        histograms[name].add(rowOfBlock[block], parseHistogramBytes(rest))
+
+    with traceStage('assemble frames'):
+        return scannedFrames(headers, sampled, fields, coreArray, histograms, videoType)
+
+def scannedFrames(headers, sampled, fields, coreArray, histograms, videoType):
+    # Same types as the text parser: counters stay integers unless a sample is missing them
+    columns = {}
+    for index, (label, convert) in enumerate(sampleFields.items()):
+        values = fields[index, sampled]
+        columns[label] = values.astype(np.int64) if convert is int and not np.isnan(values).any() else values
+    columns['timestamp'] = np.array([header.get('timestamp') for header in headers], dtype=float)[sampled]
+    columns['elapsed'] = np.array([header.get('elapsed') for header in headers], dtype=float)[sampled]
+
+    summaryColumns = {
+        'timestamp': [header.get('timestamp') for header in headers if header['kind'] == 'summary'],
+        'elapsed': [header.get('elapsed') for header in headers if header['kind'] == 'summary']}
+    for index, label in enumerate(sampleFields):
+        summaryColumns[label] = fields[index, ~sampled]
+
+    histograms = {name: histogram.frame(columns.get(clusterActiveLabels.get(name))) for name, histogram in histograms.items()}
+    return assembleFrames(columns, summaryColumns, coreArray, histograms, videoType)
+
+class HistogramBuilder:
+    # Fills one (samples x frequency bins) float32 matrix row by row. Columns are added as new frequencies
+    # show up and sorted by frequency at the end, like histogramFrames does for the text parser
+    def __init__(self, rowCount):
+        self.matrix = np.full((rowCount, 16), np.nan, dtype=np.float32)
+        self.binIndex = {}
+        self.rowIndexes = {}
+
+    def add(self, row, histogram):
+        if histogram is None:
+            return
+        frequencies, residencies = histogram
+        indexes = self.rowIndexes.get(frequencies)
+        if indexes is None:
+            for frequency in frequencies:
+                if frequency not in self.binIndex:
+                    self.binIndex[frequency] = len(self.binIndex)
+            if len(self.binIndex) > self.matrix.shape[1]:
+                self.matrix = np.pad(self.matrix, ((0, 0), (0, len(self.binIndex))), constant_values=np.nan)
+            indexes = self.rowIndexes[frequencies] = [self.binIndex[frequency] for frequency in frequencies]
+        self.matrix[row, indexes] = residencies
+
+    def frame(self, activeResidency=None):
+        frequencies = sorted(self.binIndex)
+        matrix = self.matrix[:, [self.binIndex[frequency] for frequency in frequencies]]
+        if activeResidency is not None:
+            matrix *= np.asarray(activeResidency, dtype=np.float32)[:, np.newaxis] / 100
+        return pd.DataFrame(matrix, columns=frequencies)
+
+def buildFrames(samples, videoType):
+    # Accumulate the samples column by column so no per-sample objects outlive the parse
+    columns = {label: [] for label in list(sampleFields) + ['timestamp', 'elapsed']}
+    cores = []
+    histogramRows = []
+    summaries = []
+    for sample in samples:
+        # The summary block is not one more sample, keep it out of the time series
+        if sample['kind'] == 'summary':
+            summaries.append(sample)
+            continue
+        for label, values in columns.items():
+            values.append(sample.get(label))
+        cores.append(sample.get('cores', {}))
+        histogramRows.append(sample.get('histograms', {}))
+
+    # Rows of coreArray line up with the rows of dfPower/dfFrequency/dfUsage
+    coreCount = max((int(core) + 1 for sampleCores in cores for core in sampleCores), default=0)
+    coreArray = np.full((len(cores), coreCount, len(coreMetrics)), np.nan, dtype=np.float32)
+    for row, sampleCores in enumerate(cores):
+        for core, values in sampleCores.items():
+            coreArray[row, int(core)] = values
+
+    summaryLabels = ['timestamp', 'elapsed'] + list(sampleFields)
+    summaryColumns = {label: [summary.get(label) for summary in summaries] for label in summaryLabels}
+    return assembleFrames(columns, summaryColumns, coreArray, histogramFrames(histogramRows, columns), videoType)
+
+def histogramFrames(histogramRows, columns):
+    # One (samples x frequency bins) float32 frame per histogram, the columns are the frequencies (MHz)
+    # found in this log. Bins are written a whole row at a time
+    histograms = {}
+    for name in dict.fromkeys(name for row in histogramRows for name in row):
+        frequencies = sorted({frequency for row in histogramRows if row.get(name) for frequency in row[name][0]})
+        binIndex = {frequency: index for index, frequency in enumerate(frequencies)}
+        rowIndexes = {}
+        matrix = np.full((len(histogramRows), len(frequencies)), np.nan, dtype=np.float32)
+        for rowNumber, row in enumerate(histogramRows):
+            if row.get(name):
+                rowFrequencies, residencies = row[name]
+                if rowFrequencies not in rowIndexes:
+                    rowIndexes[rowFrequencies] = [binIndex[frequency] for frequency in rowFrequencies]
+                matrix[rowNumber, rowIndexes[rowFrequencies]] = residencies
+        if name in clusterActiveLabels:
+            matrix *= np.array(columns[clusterActiveLabels[name]], dtype=np.float32)[:, np.newaxis] / 100
+        histograms[name] = pd.DataFrame(matrix, columns=frequencies)
+    return histograms
+
+def assembleFrames(columns, summaryColumns, coreArray, histograms, videoType):
+    # Sample columns (label -> values, plus timestamp and elapsed) and summary block columns to the output frames
+    dfPower = pd.DataFrame({column: columns[label] for column, label in powerColumns.items()})
+    dfFrequency = pd.DataFrame({column: columns[label] for column, label in frequencyColumns.items()})
+    dfUsage = pd.DataFrame({column: columns[label] for column, label in usageColumns.items()})
 
     # Other components power needs to be extracted out of total package power
     # e.g. result from logs
@@ -43,1537 +351,1922 @@ def regexParse(content, videoType):
         # Package Power: 99 mW
     dfPower['Other'] = dfPower['Package'] - (dfPower['Cluster'] + dfPower['DRAM'] + dfPower['GPU'])
 
-    # Check if the number of datapoints from all videos are equal
-    if((len(dfPower) != len(dfFrequency)) or (len(dfPower) != len(dfUsage)) or (len(dfUsage) != len(dfFrequency))):
-        print("The lengths of the dataframes are not equal. Check the regexes.") 
+    # Samples are never exactly 1 s long, so the time axis is the running total of the real
+    # "ms elapsed" of each sample (in seconds) rather than the sample counter
+    elapsed = pd.Series(columns['elapsed'], dtype=float)
+    dataPoints = len(dfPower)
+    dfPower['time'] = dfFrequency['time'] = dfUsage['time'] = elapsed.cumsum() / 1000
+    dfPower['timestamp'] = dfFrequency['timestamp'] = dfUsage['timestamp'] = pd.Series(columns['timestamp'], dtype=float)
+    dfPower['elapsed'] = dfFrequency['elapsed'] = dfUsage['elapsed'] = elapsed
+    dfPower['Video Type'] = dfFrequency['Video Type'] = dfUsage['Video Type'] = [videoType] * dataPoints
+
+    # One row per summary block (normally exactly one per run) with the values powermetrics averaged over the whole run
+    dfSummary = pd.DataFrame({label: pd.Series(values, dtype=float) for label, values in summaryColumns.items()})
+    dfSummary['Video Type'] = [videoType] * len(dfSummary)
+
+    return dfPower, dfFrequency, dfUsage, dfSummary, coreArray, histograms
+
+# Columns added by the parser that are not measurements
+sampleInfoColumns = ['time', 'timestamp', 'elapsed', 'Video Type', 'phase']
+
+# Across runs every measurement is kept in one long table, one row per value:
+#   run (categorical, the video type), sample (number within the run), component (categorical), metric (categorical), value (float32)
+# and the sample attributes in a second table with one row per sample: run, log, sample, time (s since the start of the run,
+# at the end of the sample), timestamp (epoch s), elapsed (ms), all float64.
+# The wide per metric frames the charts use are pivot views of both (sampleView)
+sampleMetrics = {
+    'power': list(powerColumns) + ['Other'],
+    'frequency': list(frequencyColumns),
+    'usage': list(usageColumns),
+}
+componentCategories = list(dict.fromkeys(component for components in sampleMetrics.values() for component in components))
+
+# Components counted in whole mW or MHz. Their wide columns are integers, like the parser returns them, when no sample misses them
+integerComponents = {metric: [component for component, label in columns.items() if sampleFields[label] is int]
+    for metric, columns in (('power', powerColumns), ('frequency', frequencyColumns), ('usage', usageColumns))}
+integerComponents['power'].append('Other')
+
+# Decimals powermetrics prints the residencies (%) with. mW and MHz are whole numbers and exact in float32,
+# rounding the residencies back to them gives the float64 values the parser returned
+usageDecimals = 2
+
+def sampleValues(values, metric):
+    # float32 values of the long table -> the float64 values of the wide frames. metric is one metric or the metric of every value
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.asarray(metric) == 'usage', values.round(usageDecimals), values)
+
+def tidySamples(dfPower, dfFrequency, dfUsage, runs=None):
+    # Wide frames of one or more runs to the long table and the sample table. runs is the full list of run categories,
+    # pass it when converting runs one by one so their tables concatenate without losing the categorical dtypes
+    runs = runs if runs is not None else list(dict.fromkeys(dfPower['Video Type']))
+    sampleNumbers = dfPower.groupby('Video Type', sort=False).cumcount().to_numpy(dtype=np.int32)
+    sampleRuns = pd.Categorical(dfPower['Video Type'], categories=runs)
+
+    tables = []
+    for metric, df in zip(sampleMetrics, (dfPower, dfFrequency, dfUsage)):
+        components = sampleMetrics[metric]
+        repeats = len(components)
+        tables.append(pd.DataFrame({
+            'run': pd.Categorical.from_codes(np.tile(sampleRuns.codes, repeats), categories=runs),
+            'sample': np.tile(sampleNumbers, repeats),
+            'component': pd.Categorical.from_codes(np.repeat([componentCategories.index(component) for component in components], len(df)).astype(np.int8), categories=componentCategories),
+            'metric': pd.Categorical.from_codes(np.full(repeats * len(df), list(sampleMetrics).index(metric), dtype=np.int8), categories=list(sampleMetrics)),
+            # Column after column, so each component is one contiguous block
+            'value': df[components].to_numpy(dtype=np.float32).ravel(order='F'),
+        }))
+
+    dfSampleTimes = pd.DataFrame({
+        'run': sampleRuns,
+        'sample': sampleNumbers,
+        'time': dfPower['time'].to_numpy(dtype=np.float64),
+        'timestamp': dfPower['timestamp'].to_numpy(dtype=np.float64),
+        'elapsed': dfPower['elapsed'].to_numpy(dtype=np.float64),
+    })
+    return pd.concat(tables, ignore_index=True), dfSampleTimes
+
+def sampleView(dfSamples, dfSampleTimes, metric):
+    # Wide frame of one metric, the same columns dfPower/dfFrequency/dfUsage had: one column per component
+    # plus time, timestamp, elapsed and Video Type
+    rows = dfSamples[dfSamples['metric'] == metric]
+    components = sampleMetrics[metric]
+    view = rows.set_index(['run', 'sample', 'component'])['value'].unstack('component').reindex(columns=components)
+    view = pd.DataFrame(sampleValues(view.to_numpy(), metric), index=view.index, columns=list(components))
+    for component in integerComponents[metric]:
+        if not view[component].isna().any():
+            view[component] = view[component].astype(np.int64)
+
+    info = dfSampleTimes.set_index(['run', 'sample']).reindex(view.index)
+    view['elapsed'] = info['elapsed'].to_numpy()
+    view['time'] = info['time'].to_numpy()
+    view['timestamp'] = info['timestamp'].to_numpy()
+    view = view.reset_index()
+    view['Video Type'] = view['run'].astype(str)
+    return view[components + ['time', 'timestamp', 'elapsed', 'Video Type']]
+
+def averageByVideoType(df):
+    # Time weighted mean of every measurement per video type. Each sample is weighted by its
+    # real "ms elapsed" so longer samples count for more, just like they do in the energy used
+    columns = [column for column in df.columns if column not in sampleInfoColumns]
+    values = df[columns]
+    weights = values.notna().mul(df['elapsed'], axis=0)
+    weightedSums = values.mul(df['elapsed'], axis=0).groupby(df['Video Type']).sum()
+    return (weightedSums / weights.groupby(df['Video Type']).sum()).reset_index()
+
+def energyByVideoType(dfPower):
+    # Energy used by each component over the whole run: mW x ms = µJ, so divide by 1000 for mJ
+    columns = [column for column in dfPower.columns if column not in sampleInfoColumns]
+    energy = dfPower[columns].mul(dfPower['elapsed'], axis=0).div(1000).groupby(dfPower['Video Type']).sum()
+    energy.insert(0, 'Duration (s)', dfPower['elapsed'].groupby(dfPower['Video Type']).sum() / 1000)
+    return energy.reset_index()
+
+def runAverages(dfPower, dfFrequency, dfUsage):
+    # Time weighted averages of every run, one row per run and one column per component and metric
+    averages = [averageByVideoType(df).set_index('Video Type').add_suffix(suffix) for df, suffix in ((dfPower, ' (mW)'), (dfFrequency, ' (MHz)'), (dfUsage, ' (%)'))]
+    return pd.concat(averages, axis=1).reset_index()
+
+def detectWorkloadWindows(dfPower, smoothing=5, level=0.25):
+    # The autorun scripts idle before and after the workload, find where it starts and ends in each run.
+    # A sample is active when its Package power, smoothed with a rolling median so lone background spikes
+    # don't count, is above the idle level plus a quarter of the way to the busy level of its run
+    runs = dfPower.groupby('Video Type', sort=False)['Package']
+    smoothed = runs.rolling(smoothing, center=True, min_periods=1).median().droplevel(0).sort_index()
+    idle, busy = dfPower['Video Type'].map(runs.quantile(0.1)), dfPower['Video Type'].map(runs.quantile(0.9))
+    active = smoothed > idle + level * (busy - idle)
+
+    # A window runs from the start of the first active sample to the end of the last one
+    sampleStart = dfPower['time'] - dfPower['elapsed'] / 1000
+    windows = pd.DataFrame({
+        'start': sampleStart[active].groupby(dfPower['Video Type'][active]).min(),
+        'end': dfPower['time'][active].groupby(dfPower['Video Type'][active]).max()})
+
+    # Runs without any contrast (always idle or always busy) keep their whole capture
+    whole = pd.DataFrame({'start': sampleStart.groupby(dfPower['Video Type']).min(), 'end': dfPower['time'].groupby(dfPower['Video Type']).max()})
+    return windows.combine_first(whole)
+
+def workloadWindows(dfPower, idlePadding=None, knownWindows=None):
+    # Workload window (start, end in seconds on the time axis) of every run. Windows given as metadata win, then
+    # a fixed idle padding trimmed off both ends of the capture, otherwise the window is detected from the power
+    if idlePadding is not None:
+        whole = dfPower.groupby('Video Type')['time'].agg(['max'])
+        windows = pd.DataFrame({'start': idlePadding, 'end': whole['max'] - idlePadding}, index=whole.index)
+        # A run shorter than the padding at both ends has no window left, detect it from the power instead
+        short = windows.index[windows['end'] <= windows['start']]
+        if len(short):
+            windows.loc[short] = detectWorkloadWindows(dfPower).loc[short, ['start', 'end']]
+            for videoType in short:
+                print(f"{videoType} is not longer than twice the {idlePadding:g} s idle padding, its workload window is detected from the power")
     else:
-        dataPoints = len(dfPower)
-        dfPower['time'] = dfFrequency['time'] = dfUsage['time'] = list(range(1, dataPoints + 1))
-        dfPower['Video Type'] = dfFrequency['Video Type'] = dfUsage['Video Type'] = [videoType] * dataPoints
-
-    return dfPower, dfFrequency, dfUsage
-
-def buildVLCCharts(dfPower, dfFrequency, dfUsage, config, kLogo):
-
-    fig = px.area(dfPower.loc[dfPower["Video Type"].isin(["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"])], x='time', y=['Package'], template='plotly_dark', 
-    width = 700, height = 350, facet_col='Video Type', line_shape= "spline", facet_col_wrap = 5,
-    labels={"value": "Power Consumption (mW)", "time": "Time (s)"}, color_discrete_map={"Package": "#57FFBC"},
-    category_orders={"Video Type": ["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"]})
-    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']:
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=11)
-    
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
-    fig.update_xaxes(showgrid=False, title_font = dict(size=10), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    fig.update_traces(hovertemplate='%{y} (mW)', line_smoothing = 1.3)
-    fig.update_layout(autosize = True, hovermode="x", 
-        showlegend = False, font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Total Package Power Consumption over Time</b> <br> <sup> Apple Mac Mini M1 | VLC 3.0.12.1 (local files) | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 50, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1, y=0.79, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.17,
-            sizex=0.2, sizey=0.2,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    fig.write_html("outputs/plotly-power-package.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-package.svg")
-
-    # Figure for Total Power Over Time
-    fig = px.line(dfPower.loc[dfPower["Video Type"].isin(["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"])], x='time', y=['Efficiency Cluster', 'Performance Cluster', 'DRAM', 'GPU', 'Other'], template='plotly_dark', 
-    width = 700, height = 1000, facet_row='Video Type', line_shape= "spline", render_mode = "svg",
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    # color_discrete_sequence=px.colors.sequential.YlOrRd,
-    # color_discrete_map={
-    #     "Efficiency Cluster": "#AA0EFE",
-    #     "Performance Cluster": "#1CBE50",
-    #     "DRAM": "#57FFBC",
-    #     "GPU": "#2ED9FF",
-    #     # "Other": "rgb(95, 70, 144)"
-    #     "Other": "#FBE426"
-    # },
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels = {"value": "Power Consumption (mW)", "time": "Time (s)"}, 
-    category_orders = {"Video Type": ["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"]})
-
-    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']: 
-        # print(annotation)
-        annotation['textangle'] = 0
-        annotation['xanchor'] = 'right'
-        annotation['x'] = annotation['x'] - 0.002
-        annotation['y'] = annotation['y'] + 0.038
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=13)
-
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
-    fig.update_xaxes(showgrid=False, color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    # fig.update_traces(hovertemplate='%{y} (mW)', line_smoothing = 1.3)
-    fig.update_traces(hovertemplate='%{y} (mW)')
-    fig.update_layout(legend_title_text='', autosize = True, hovermode="x", 
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Power Consumption over Time</b> <br> <sup> Apple Mac Mini M1 | VLC 3.0.12.1 (local files) | MacOS 11.2.2 </sup>",
-            'y':0.97,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'left', yanchor = 'top', 
-        x=0.01, y=0.965, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.119, y=1.038,
-            sizex=0.065, sizey=0.065,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-power-total.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-total.svg")
-
-    # Figure for Total Power Over Time
-    fig = px.line(dfPower.loc[dfPower["Video Type"].isin(["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"])], x='time', y=['Efficiency Cluster', 'Performance Cluster', 'DRAM', 'GPU', 'Other'],  
-    width = 700, height = 1000, facet_row='Video Type', render_mode = "svg")
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-power-total-2.html", include_plotlyjs="cdn")
-
-    # BAR CHART FOR Averages by component
-    # Pull out only the non-browser video types
-    barDf = (dfPower.loc[dfPower["Video Type"].isin(["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"])]).groupby(['Video Type']).mean().reset_index()
-
-    # Now use the filtered columns to create the bar chart
-    fig = px.bar(barDf, x='Video Type', y=['Efficiency Cluster', 'Performance Cluster', 'DRAM', 'GPU', 'Other'], template='plotly_dark', orientation='v', hover_name = 'Video Type',
-    width = 700, height = 400, barmode = 'group', 
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0"
+        windows = detectWorkloadWindows(dfPower)
+    for videoType, (start, end) in (knownWindows or {}).items():
+        if videoType in windows.index:
+            windows.loc[videoType] = [start, end]
+    windows.index.name = 'Video Type'
+    return windows
+
+def workloadEnergy(dfPower, windows):
+    # Energy of every component over each run's workload window. Samples straddling a window edge count
+    # for the part of their real elapsed time inside the window: mW x ms = µJ, so divide by 1e6 for J
+    columns = [column for column in dfPower.columns if column not in sampleInfoColumns]
+    start = dfPower['Video Type'].map(windows['start'])
+    end = dfPower['Video Type'].map(windows['end'])
+    sampleEnd = dfPower['time']
+    sampleStart = sampleEnd - dfPower['elapsed'] / 1000
+    insideMs = (np.minimum(sampleEnd, end) - np.maximum(sampleStart, start)).clip(lower=0) * 1000
+
+    energy = dfPower[columns].mul(insideMs, axis=0).groupby(dfPower['Video Type']).sum() / 1e6
+    duration = insideMs.groupby(dfPower['Video Type']).sum() / 1000
+
+    report = pd.DataFrame({'Start (s)': windows['start'], 'End (s)': windows['end'], 'Duration (s)': duration})
+    report = report.join(energy.add_suffix(' (J)')).join(energy.div(duration, axis=0).add_suffix(' (J/s)'))
+    report.index.name = 'Video Type'
+    return report.reset_index()
+
+def segmentCost(sums, squares, start, end):
+    # Squared error around the mean of [start, end), summed over the series, from their cumulative sums
+    length = (end - start)[..., np.newaxis] if np.ndim(end) or np.ndim(start) else end - start
+    segmentSums = sums[end] - sums[start]
+    return ((squares[end] - squares[start]) - segmentSums ** 2 / length).sum(axis=-1)
+
+def changePoints(values, penalty, minSize=5):
+    # Binary segmentation for shifts in the mean of (samples x series) values scaled to unit noise. Each split
+    # scores every candidate position at once from cumulative sums, so a level of splits is O(n) and the
+    # whole search O(n log n) for balanced splits. Returns the sorted indexes where a new phase starts
+    sums = np.vstack((np.zeros((1, values.shape[1])), np.cumsum(values, axis=0)))
+    squares = np.vstack((np.zeros((1, values.shape[1])), np.cumsum(values ** 2, axis=0)))
+
+    boundaries = []
+    segments = [(0, len(values))]
+    while segments:
+        start, end = segments.pop()
+        if end - start < 2 * minSize:
+            continue
+        splits = np.arange(start + minSize, end - minSize + 1)
+        gain = segmentCost(sums, squares, start, end) - segmentCost(sums, squares, start, splits) - segmentCost(sums, squares, splits, end)
+        best = np.argmax(gain)
+        if gain[best] > penalty:
+            boundaries.append(splits[best])
+            segments += [(start, splits[best]), (splits[best], end)]
+    return sorted(boundaries)
+
+def segmentPhases(dfPower, dfUsage=None, penalty=10, minSize=5):
+    # Phase id of every sample (0, 1, ... within each run) from shifts in Package power, and optionally the
+    # cluster residencies. Power is compared on a log scale so a busy phase's spikes don't split it further,
+    # each series is scaled by its noise level (MAD of the sample to sample changes)
+    series = [np.log1p(dfPower['Package'].clip(lower=0).to_numpy(dtype=np.float64))]
+    if dfUsage is not None:
+        series += [dfUsage[column].to_numpy(dtype=np.float64) for column in ['Efficiency Cluster', 'Performance Cluster']]
+    values = np.nan_to_num(np.column_stack(series))
+
+    phases = np.zeros(len(dfPower), dtype=np.int16)
+    for indices in dfPower.groupby('Video Type', sort=False).indices.values():
+        runValues = values[indices]
+        noise = np.median(np.abs(np.diff(runValues, axis=0)), axis=0) / (0.6745 * np.sqrt(2)) if len(indices) > 1 else np.ones(values.shape[1])
+        runValues = runValues / np.where(noise > 0, noise, 1)
+
+        starts = np.zeros(len(indices), dtype=np.int16)
+        starts[changePoints(runValues, penalty * values.shape[1] * np.log(max(len(indices), 2)), minSize)] = 1
+        phases[indices] = np.cumsum(starts)
+    return pd.Series(phases, index=dfPower.index, name='phase')
+
+def phaseStats(dfPower):
+    # Per run and phase: where it starts and ends, time weighted mean power of every component and the energy used
+    columns = [column for column in dfPower.columns if column not in sampleInfoColumns]
+    phases = dfPower.groupby(['Video Type', 'phase'])
+    weighted = dfPower[columns].mul(dfPower['elapsed'], axis=0).groupby([dfPower['Video Type'], dfPower['phase']]).sum()
+    elapsed = phases['elapsed'].sum()
+
+    stats = pd.DataFrame({
+        'Start (s)': (dfPower['time'] - dfPower['elapsed'] / 1000).groupby([dfPower['Video Type'], dfPower['phase']]).min(),
+        'End (s)': phases['time'].max(),
+        'Duration (s)': elapsed / 1000})
+    stats = stats.join(weighted.div(elapsed, axis=0).add_suffix(' (mW)'))
+    stats['Package (J)'] = weighted['Package'] / 1e6
+    return stats.reset_index()
+
+def summaryByVideoType(dfSummary, columnMap, other=False):
+    # Whole run averages straight from the powermetrics summary blocks, laid out like averageByVideoType
+    # e.g. summaryByVideoType(dfSummary, powerColumns, other=True). A run split over several logs weighs each
+    # summary by its elapsed time
+    summary = pd.DataFrame({column: dfSummary[label] for column, label in columnMap.items()})
+    if other:
+        summary['Other'] = summary['Package'] - (summary['Cluster'] + summary['DRAM'] + summary['GPU'])
+    weights = dfSummary['elapsed']
+    sums = summary.mul(weights, axis=0).groupby(dfSummary['Video Type']).sum()
+    return sums.div(weights.groupby(dfSummary['Video Type']).sum(), axis=0).rename_axis('Video Type').reset_index()
+
+def summaryAverages(dfSummary):
+    # runAverages from the summary blocks instead of the samples, nothing is averaged again.
+    # Runs whose logs have no summary block are left out
+    if dfSummary.empty:
+        return pd.DataFrame({'Video Type': pd.Series(dtype=str)})
+    averages = [summaryByVideoType(dfSummary, columnMap, other).set_index('Video Type').add_suffix(suffix)
+        for columnMap, other, suffix in ((powerColumns, True, ' (mW)'), (frequencyColumns, False, ' (MHz)'), (usageColumns, False, ' (%)'))]
+    return pd.concat(averages, axis=1).reset_index()
+
+def concatCoreArrays(coreArrays):
+    # Runs from machines with fewer cores are padded with NaN up to the largest core count
+    coreCount = max((coreArray.shape[1] for coreArray in coreArrays), default=0)
+    padded = [np.pad(coreArray, ((0, 0), (0, coreCount - coreArray.shape[1]), (0, 0)), constant_values=np.nan) for coreArray in coreArrays]
+    return np.concatenate(padded) if padded else np.empty((0, 0, len(coreMetrics)), dtype=np.float32)
+
+def coreFrame(coreArray, dfSampleTimes):
+    # Long format dataframe of the per core array, one row per (run, sample, core). Rows of coreArray line up
+    # with the rows of dfSampleTimes, both are the checked samples of every log in load order
+    samples, coreCount, _ = coreArray.shape
+    dfCores = pd.DataFrame({
+        'run': pd.Categorical.from_codes(np.repeat(dfSampleTimes['run'].cat.codes, coreCount), dtype=dfSampleTimes['run'].dtype),
+        'log': pd.Categorical.from_codes(np.repeat(dfSampleTimes['log'].cat.codes, coreCount), dtype=dfSampleTimes['log'].dtype),
+        'sample': np.repeat(dfSampleTimes['sample'].to_numpy(), coreCount),
+        'time': np.repeat(dfSampleTimes['time'].to_numpy(), coreCount),
+        'core': np.tile(np.arange(coreCount, dtype=np.int16), samples),
+    })
+    for index, metric in enumerate(coreMetrics):
+        dfCores[metric] = coreArray[:, :, index].reshape(-1)
+    return dfCores
+
+def concatHistograms(runs):
+    # runs is a list of (histograms, sample count) per log. A run without a given histogram gets NaN rows
+    # so every histogram keeps lining up with dfPower
+    histograms = {}
+    for name in dict.fromkeys(name for runHistograms, _ in runs for name in runHistograms):
+        frames = [runHistograms.get(name, pd.DataFrame(index=range(samples))) for runHistograms, samples in runs]
+        histograms[name] = pd.concat(frames, ignore_index=True).sort_index(axis=1).astype(np.float32)
+    return histograms
+
+def timeInState(histogram, dfSampleTimes):
+    # Seconds spent active at each frequency per run and log: residency (%) x elapsed (ms) / 100 / 1000
+    seconds = histogram.mul(dfSampleTimes['elapsed'].to_numpy() / 100000, axis=0)
+    return seconds.groupby([dfSampleTimes['run'].to_numpy(), dfSampleTimes['log'].to_numpy()], sort=False).sum()
+
+def weightedFrequency(histogram):
+    # Residency weighted mean frequency (MHz) of every sample, NaN when nothing was active
+    residencies = np.nan_to_num(histogram.to_numpy(dtype=np.float64))
+    totals = residencies.sum(axis=1)
+    weighted = residencies @ histogram.columns.to_numpy(dtype=np.float64)
+    return pd.Series(np.divide(weighted, totals, out=np.full(len(totals), np.nan), where=totals > 0), index=histogram.index)
+
+def timeInStateTable(histograms, dfSampleTimes):
+    # Long table of the seconds every run spent at each frequency of every cluster, core and GPU histogram
+    frames = []
+    for name, histogram in histograms.items():
+        seconds = timeInState(histogram, dfSampleTimes).rename_axis(['run', 'log']).reset_index()
+        seconds = seconds.melt(id_vars=['run', 'log'], var_name='frequency', value_name='seconds')
+        seconds.insert(2, 'histogram', name)
+        frames.append(seconds)
+    if not frames:
+        return pd.DataFrame({'run': pd.Series(dtype=str), 'log': pd.Series(dtype=str), 'histogram': pd.Series(dtype=str), 'frequency': pd.Series(dtype=np.int64), 'seconds': pd.Series(dtype=np.float64)})
+    dfTimeInState = pd.concat(frames, ignore_index=True)
+    dfTimeInState['frequency'] = dfTimeInState['frequency'].astype(np.int64)
+    return dfTimeInState
+
+def weightedFrequencies(histograms, dfSampleTimes):
+    # Residency weighted frequency of every sample, one column per histogram
+    dfWeighted = dfSampleTimes[['run', 'log', 'sample', 'time']].copy()
+    for name, histogram in histograms.items():
+        dfWeighted[name] = weightedFrequency(histogram).to_numpy()
+    return dfWeighted
+
+def activeFrequencies(dfTimeInState):
+    # Mean frequency (MHz) of every run while active, weighted by the time spent at each frequency
+    weighted = dfTimeInState.assign(weighted=dfTimeInState['seconds'] * dfTimeInState['frequency'])
+    sums = weighted.groupby(['run', 'histogram'], sort=False)[['weighted', 'seconds']].sum()
+    frequencies = (sums['weighted'] / sums['seconds'].where(sums['seconds'] > 0)).unstack('histogram')
+    return frequencies.reindex(columns=list(dict.fromkeys(dfTimeInState['histogram']))).rename_axis(columns=None).reset_index()
+
+def plistPower(values, prefix, elapsedSeconds):
+    # Depending on the macOS release a component is reported as "<prefix>power" (mW) or as
+    # "<prefix>energy" (mJ over the sample), always hand back mW like the text output
+    if values.get(prefix + 'power') is not None:
+        return int(round(values[prefix + 'power']))
+    if values.get(prefix + 'energy') is not None and elapsedSeconds:
+        return int(round(values[prefix + 'energy'] / elapsedSeconds))
+    return None
+
+def plistHistogram(states, elapsedNs, activeRatio=None):
+    # dvfm_states -> the same ((MHz, ...), [residency %, ...]) pair parseHistogram returns for text logs.
+    # Cluster histograms in the text output are a split of the active time, so divide those back out
+    if not states or not elapsedNs:
+        return None
+    residencies = [state.get('used_ns', 0) / elapsedNs * 100 for state in states]
+    if activeRatio is not None:
+        residencies = [residency / activeRatio if activeRatio else 0.0 for residency in residencies]
+    return tuple(int(state['freq']) for state in states), residencies
+
+def plistSample(plist):
+    # Map one powermetrics property list onto the sample dict streamSamples yields for a text block
+    elapsedNs = plist.get('elapsed_ns')
+    elapsedSeconds = elapsedNs / 1e9 if elapsedNs else None
+    sample = {'kind': 'sampled', 'histograms': {}, 'cores': {}}
+    if elapsedNs:
+        sample['elapsed'] = elapsedNs / 1e6
+    if isinstance(plist.get('timestamp'), datetime):
+        # plistlib dates are naive UTC
+        sample['timestamp'] = plist['timestamp'].replace(tzinfo=timezone.utc).timestamp()
+
+    processor = plist.get('processor', {})
+    for cluster in processor.get('clusters', []):
+        name = cluster.get('name', '')
+        activeRatio = 1 - cluster.get('idle_ratio', 1)
+        if name + ' Power' in sampleFields:
+            # Reported either on the cluster itself or as e.g. "ecluster_power" on the processor
+            sample[name + ' Power'] = plistPower(cluster, '', elapsedSeconds)
+            if sample[name + ' Power'] is None:
+                sample[name + ' Power'] = plistPower(processor, name.split('-')[0].lower() + 'cluster_', elapsedSeconds)
+            sample[name + ' HW active frequency'] = int(round(cluster.get('freq_hz', 0) / 1e6))
+            sample[name + ' HW active residency'] = activeRatio * 100
+            sample['histograms'][name] = plistHistogram(cluster.get('dvfm_states'), elapsedNs, activeRatio)
+
+        for cpu in cluster.get('cpus', []):
+            core = str(cpu['cpu'])
+            idleResidency = cpu.get('idle_ratio', 1) * 100
+            sample['cores'][core] = [cpu.get('freq_hz', 0) / 1e6, idleResidency, 100 - idleResidency]
+            sample['histograms']['cpu ' + core] = plistHistogram(cpu.get('dvfm_states'), elapsedNs)
+
+    sample['Clusters Total Power'] = plistPower(processor, 'cpu_', elapsedSeconds)
+    sample['DRAM Power'] = plistPower(processor, 'dram_', elapsedSeconds)
+    sample['Package Power'] = plistPower(processor, 'package_', elapsedSeconds)
+    if sample['Package Power'] is None:
+        sample['Package Power'] = plistPower(processor, 'combined_', elapsedSeconds)
+
+    gpu = plist.get('gpu', {})
+    sample['GPU Power'] = plistPower(processor, 'gpu_', elapsedSeconds)
+    if sample['GPU Power'] is None:
+        sample['GPU Power'] = plistPower(gpu, '', elapsedSeconds)
+    if gpu:
+        sample['GPU active frequency'] = int(round(gpu.get('freq_hz', 0) / 1e6))
+        sample['GPU active residency'] = (1 - gpu.get('idle_ratio', 1)) * 100
+        sample['histograms']['GPU'] = plistHistogram(gpu.get('dvfm_states'), elapsedNs)
+
+    # Keep the sample dict sparse like a text block, a missing value is simply absent
+    return {label: value for label, value in sample.items() if value is not None}
+
+def streamPlists(file):
+    # "powermetrics -f plist" writes one property list per sample separated by NUL bytes.
+    # Read the binary file in chunks and only ever hold the current sample in memory
+    pending = b''
+    for chunk in iter(lambda: file.read(1 << 20), b''):
+        pending += chunk
+        *plists, pending = pending.split(b'\0')
+        for plist in plists:
+            if plist.strip():
+                yield plistlib.loads(plist.strip())
+    if pending.strip():
+        yield plistlib.loads(pending.strip())
+
+def streamPlistSamples(file):
+    for plist in streamPlists(file):
+        yield plistSample(plist)
+
+def sniffLogFormat(path):
+    # Text logs start with "Machine model:" while plist logs start with an XML or binary plist header
+    with open(path, 'rb') as file:
+        head = file.read(64).lstrip(b'\0 \t\r\n')
+    return 'plist' if head.startswith((b'<?xml', b'<!DOCTYPE plist', b'<plist', b'bplist')) else 'text'
+
+def parseLogFile(path, videoType):
+    # Stream the log straight from disk instead of reading it into one string first
+    if sniffLogFormat(path) == 'plist':
+        with open(path, 'rb') as file:
+            return buildFrames(streamPlistSamples(file), videoType)
+
+    return scanTextLog(path, videoType)
+
+def updateRunningTotals(totals, sample):
+    # O(1) per sample: only elapsed weighted sums are kept, so means and energy never need the samples again
+    elapsed = sample.get('elapsed')
+    if sample['kind'] != 'sampled' or not elapsed:
+        return
+    totals['samples'] += 1
+    totals['elapsed'] += elapsed
+    for column, label in powerColumns.items():
+        if label in sample:
+            totals['power'][column] = totals['power'].get(column, 0) + sample[label] * elapsed
+
+def printRunningTotals(totals, sample):
+    if sample['kind'] == 'summary':
+        print(f"Summary block: Package {sample.get('Package Power')} mW over {sample.get('elapsed', 0) / 1000:.1f} s")
+        return
+    # mW x ms = µJ
+    packageEnergy = totals['power'].get('Package', 0)
+    packageMean = packageEnergy / totals['elapsed'] if totals['elapsed'] else 0
+    print(f"{totals['elapsed'] / 1000:9.1f} s  sample {totals['samples']:6d}  Package {sample.get('Package Power', '-'):>5} mW"
+          f"  mean {packageMean:7.1f} mW  energy {packageEnergy / 1e6:9.1f} J")
+
+def followLog(path, pollInterval=1.0):
+    # Tail a text log while powermetrics is still writing it (e.g. started by the autorun scripts).
+    # Only newly appended bytes are read and a block is parsed once the next header shows it is complete
+    decoder = codecs.getincrementaldecoder('utf8')(errors='ignore')
+    totals = {'samples': 0, 'elapsed': 0.0, 'power': {}}
+    offset = 0
+    pending = ''
+
+    with open(path, 'rb') as file:
+        try:
+            while True:
+                # The log was truncated or replaced by a new run, start over
+                if os.stat(path).st_size < offset:
+                    file.seek(0)
+                    offset, pending = 0, ''
+                    decoder.reset()
+                    totals = {'samples': 0, 'elapsed': 0.0, 'power': {}}
+
+                chunk = file.read(1 << 20)
+                if not chunk:
+                    time.sleep(pollInterval)
+                    continue
+                offset += len(chunk)
+                pending += decoder.decode(chunk)
+
+                # Everything before the last header is made of complete blocks, the rest may still be written
+                lastHeader = pending.rfind('\n*** ')
+                if lastHeader < 0:
+                    continue
+                complete, pending = pending[:lastHeader + 1], pending[lastHeader + 1:]
+                for sample in streamSamples(complete.splitlines()):
+                    updateRunningTotals(totals, sample)
+                    printRunningTotals(totals, sample)
+        except KeyboardInterrupt:
+            # Stopped by the user, the trailing block is as complete as it is going to get
+            for sample in streamSamples(pending.splitlines()):
+                updateRunningTotals(totals, sample)
+                printRunningTotals(totals, sample)
+
+    if totals['elapsed']:
+        print(f"\n{totals['samples']} samples over {totals['elapsed'] / 1000:.1f} s")
+        for column, weightedSum in totals['power'].items():
+            print(f"{column:>20}: mean {weightedSum / totals['elapsed']:8.1f} mW  energy {weightedSum / 1e6:9.1f} J")
+    return totals
+
+# Every traced stage in the order it started, as {'name', 'details', 'depth', 'pid', 'start', 'wall', 'cpu', 'peakMB'}.
+# 'start' is in seconds since the first stage. 'peakMB' is only there while tracemalloc is tracing: the most memory
+# the stage allocated on top of what was already allocated when it started. Stages of pool tasks are added by their parent
+stageTrace = []
+traceState = {'origin': None, 'depth': 0, 'memory': []}
+
+def traceOrigin():
+    if traceState['origin'] is None:
+        traceState['origin'] = time.perf_counter()
+    return traceState['origin']
+
+@contextlib.contextmanager
+def traceStage(name, **details):
+    # Wall time, CPU time of this process and peak allocation of one stage. Cheap enough to always be on,
+    # main only decides whether the trace is written or printed
+    record = {'name': name, 'details': details, 'depth': traceState['depth'], 'pid': os.getpid(), 'start': time.perf_counter() - traceOrigin()}
+    stageTrace.append(record)
+    tracing = tracemalloc.is_tracing()
+    if tracing:
+        # The traced peak is global, hand the peak reached so far to the enclosing stage before resetting it
+        allocated, peak = tracemalloc.get_traced_memory()
+        if traceState['memory']:
+            traceState['memory'][-1][1] = max(traceState['memory'][-1][1], peak)
+        tracemalloc.reset_peak()
+        traceState['memory'].append([allocated, allocated])
+    traceState['depth'] += 1
+    wallStart, cpuStart = time.perf_counter(), time.process_time()
+    try:
+        yield record
+    finally:
+        record['wall'] = time.perf_counter() - wallStart
+        record['cpu'] = time.process_time() - cpuStart
+        traceState['depth'] -= 1
+        if tracing:
+            allocated, peak = traceState['memory'].pop()
+            peak = max(peak, tracemalloc.get_traced_memory()[1])
+            record['peakMB'] = (peak - allocated) / 1024 / 1024
+            if traceState['memory']:
+                traceState['memory'][-1][1] = max(traceState['memory'][-1][1], peak)
+
+def tracedTask(task, origin, traceMemory, args):
+    # Runs one pool task with a trace of its own (forked workers inherit the parent's) and returns its result
+    # together with the stages it recorded, on the same clock as the parent trace
+    del stageTrace[:]
+    traceState.update({'origin': origin, 'depth': 0, 'memory': []})
+    if traceMemory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    return task(*args), list(stageTrace)
+
+def tracedMap(pool, task, *iterables):
+    # pool.map for tracedTask, the stages of every task are added under the current stage
+    results = []
+    for result, records in pool.map(tracedTask, itertools.repeat(task), itertools.repeat(traceOrigin()), itertools.repeat(tracemalloc.is_tracing()), zip(*iterables)):
+        for record in records:
+            record['depth'] += traceState['depth']
+        stageTrace.extend(records)
+        results.append(result)
+    return results
+
+def printTraceSummary(records):
+    # Every stage indented under the stage it ran in, slowest figures and logs are easy to spot in the wall column
+    memory = any('peakMB' in record for record in records)
+    print(f"{'stage':<60} {'wall (s)':>9} {'cpu (s)':>9}" + (f" {'peak (MB)':>10}" if memory else ""))
+    for record in records:
+        label = "  " * record['depth'] + " ".join([record['name']] + [key if value is True else str(value) for key, value in record['details'].items()])
+        print(f"{label[:60]:<60} {record['wall']:9.3f} {record['cpu']:9.3f}" + (f" {record['peakMB']:10.1f}" if 'peakMB' in record else ""))
+
+def videoTypeFromFileName(logsFile):
+    if (logsFile.find('mp4') >= 0) or (logsFile.find('webm') >= 0):
+        # Transform 4K-AV1.mp4.txt -> 4K-AV1 because that's what we want in the charts
+        f_name = os.path.splitext(logsFile)[0]
+        return str.split(f_name, '.')[0]
+
+    # Used for file paths like Safari-VP9-HW.txt i.e. without the video container (mp4, webm)
+    return os.path.splitext(logsFile)[0]
+
+def cacheEntryPath(cacheFolder, path):
+    return os.path.join(cacheFolder, hashlib.sha1(os.path.abspath(path).encode('utf8')).hexdigest() + '.npz')
+
+def fileDigest(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def packCacheItem(arrays, prefix, item):
+    # Flatten a dataframe, numpy array or dict of those into named arrays for np.savez.
+    # Text is stored as fixed width unicode so the cache never needs pickle to load
+    if isinstance(item, np.ndarray):
+        arrays[prefix + ':array'] = item
+    elif isinstance(item, dict):
+        arrays[prefix + ':keys'] = np.array(list(item), dtype=str)
+        for index, value in enumerate(item.values()):
+            packCacheItem(arrays, f'{prefix}.{index}', value)
+    else:
+        numericColumns = pd.api.types.is_numeric_dtype(item.columns) and len(item.columns) > 0
+        # The row count too, a frame without columns (a histogram with no DVFS states) still has one row per sample
+        arrays[prefix + ':rows'] = np.array(len(item))
+        arrays[prefix + ':columns'] = item.columns.to_numpy() if numericColumns else np.array(item.columns, dtype=str)
+        for index, column in enumerate(item.columns):
+            values = item[column]
+            arrays[f'{prefix}:{index}'] = values.to_numpy() if pd.api.types.is_numeric_dtype(values) else values.to_numpy(dtype=str)
+
+def unpackCacheItem(entry, prefix):
+    if prefix + ':array' in entry.files:
+        return entry[prefix + ':array']
+    if prefix + ':keys' in entry.files:
+        return {key: unpackCacheItem(entry, f'{prefix}.{index}') for index, key in enumerate(entry[prefix + ':keys'].tolist())}
+    columns = entry[prefix + ':columns'].tolist()
+    return pd.DataFrame({column: entry[f'{prefix}:{index}'] for index, column in enumerate(columns)}, columns=columns,
+        index=range(int(entry[prefix + ':rows'])))
+
+def loadCacheEntry(cacheFolder, path):
+    # Returns the cached frames for a log, or None when the log is new, changed or was parsed by another parser version
+    entryPath = cacheEntryPath(cacheFolder, path)
+    if not os.path.isfile(entryPath):
+        return None
+
+    stat = os.stat(path)
+    try:
+        with np.load(entryPath, allow_pickle=False) as entry:
+            if int(entry['version']) != parserVersion or int(entry['size']) != stat.st_size:
+                return None
+
+            # Same size but touched since it was cached, only a content hash can tell if it really changed
+            digest = None
+            if int(entry['mtime']) != stat.st_mtime_ns:
+                digest = fileDigest(path)
+                if str(entry['digest']) != digest:
+                    return None
+
+            frames = [unpackCacheItem(entry, str(i)) for i in range(int(entry['frames']))]
+    except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+        # A truncated or foreign cache file is just a cache miss
+        return None
+
+    if digest is not None:
+        # Store the entry again with the new mtime, or every later run would hash the whole log again
+        storeCacheEntry(cacheFolder, path, frames, digest)
+    else:
+        # Mark the entry as recently used so pruneCache evicts it last
+        os.utime(entryPath)
+    return tuple(frames)
+
+def storeCacheEntry(cacheFolder, path, frames, digest=None):
+    stat = os.stat(path)
+    arrays = {'version': parserVersion, 'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'digest': digest or fileDigest(path), 'frames': len(frames)}
+    for i, frame in enumerate(frames):
+        packCacheItem(arrays, str(i), frame)
+
+    # Write to a temporary file first so a concurrent reader never sees a half written entry
+    os.makedirs(cacheFolder, exist_ok=True)
+    entryPath = cacheEntryPath(cacheFolder, path)
+    temporaryPath = f'{entryPath}.{os.getpid()}.tmp'
+    with open(temporaryPath, 'wb') as file:
+        np.savez(file, **arrays)
+    os.replace(temporaryPath, entryPath)
+
+def pruneCache(cacheFolder, maxBytes):
+    # Evict the least recently used entries until the cache fits in maxBytes
+    if not os.path.isdir(cacheFolder):
+        return
+
+    entries = []
+    for entryName in os.listdir(cacheFolder):
+        if entryName.endswith('.npz'):
+            stat = os.stat(os.path.join(cacheFolder, entryName))
+            entries.append((stat.st_mtime, stat.st_size, entryName))
+
+    totalBytes = sum(size for _, size, _ in entries)
+    for _, size, entryName in sorted(entries):
+        if totalBytes <= maxBytes:
+            break
+        os.remove(os.path.join(cacheFolder, entryName))
+        totalBytes -= size
+
+def invalidateCache(cacheFolder):
+    if os.path.isdir(cacheFolder):
+        for entryName in os.listdir(cacheFolder):
+            if entryName.endswith('.npz') or entryName.endswith('.tmp'):
+                os.remove(os.path.join(cacheFolder, entryName))
+
+# Lines before the first sample of a text log, e.g. "Machine model: Macmini9,1", and the plist keys holding the same
+runHeaderLabels = {
+    'Machine model': 'hw_model',
+    'OS version': 'kern_osversion',
+    'Boot arguments': 'kern_bootargs',
+    'Boot time': 'kern_boottime',
+}
+
+def scanRun(path):
+    # Metadata record of one log: its header, when it started, how long it ran and how many samples it has.
+    # Text logs only have their header and the "*** Sampled" lines looked at, none of the measurements are parsed
+    record = {label: None for label in runHeaderLabels}
+    samples, elapsed, start = 0, 0.0, None
+
+    if sniffLogFormat(path) == 'plist':
+        with open(path, 'rb') as file:
+            for plist in streamPlists(file):
+                if samples == 0:
+                    for label, key in runHeaderLabels.items():
+                        record[label] = plist.get(key)
+                    if isinstance(record['Boot time'], (int, float)):
+                        record['Boot time'] = datetime.fromtimestamp(record['Boot time'], timezone.utc).strftime('%a %b %d %H:%M:%S %Y')
+                samples += 1
+                elapsed += plist.get('elapsed_ns', 0) / 1e6
+                if start is None and isinstance(plist.get('timestamp'), datetime):
+                    start = plist['timestamp'].replace(tzinfo=timezone.utc).timestamp()
+    else:
+        with open(path, 'r', encoding="utf8", errors='ignore') as file:
+            for line in file:
+                if line.startswith('*** Sampled'):
+                    header = parseSampleHeader(line)
+                    samples += 1
+                    elapsed += header.get('elapsed', 0)
+                    if start is None:
+                        start = header.get('timestamp')
+                elif samples == 0:
+                    label, separator, value = line.partition(':')
+                    if separator and label in runHeaderLabels:
+                        record[label] = value.strip()
+
+    stat = os.stat(path)
+    record.update({
+        'path': path,
+        'Video Type': videoTypeFromFileName(os.path.basename(path)),
+        'Date': datetime.fromtimestamp(start, timezone.utc).date().isoformat() if start is not None else None,
+        'Start': start,
+        'Duration (s)': elapsed / 1000,
+        'Samples': samples,
+        'size': stat.st_size,
+        'mtime': stat.st_mtime_ns,
+        'version': parserVersion,
+    })
+    return record
+
+def loadRunIndex(indexPath, paths):
+    # Metadata of every log, kept in a small json file so runs can be listed and filtered without opening the
+    # logs again. Only logs that are new or changed (size, mtime) since the last time are scanned
+    try:
+        with open(indexPath) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+
+    records = {}
+    for path in paths:
+        stat = os.stat(path)
+        record = index.get(path)
+        if not record or record.get('size') != stat.st_size or record.get('mtime') != stat.st_mtime_ns or record.get('version') != parserVersion:
+            record = scanRun(path)
+        records[path] = record
+
+    if records != index:
+        os.makedirs(os.path.dirname(indexPath) or '.', exist_ok=True)
+        storeJson(indexPath, records)
+
+    columns = ['Video Type'] + list(runHeaderLabels) + ['Date', 'Start', 'Duration (s)', 'Samples', 'path', 'size', 'mtime', 'version']
+    return pd.DataFrame(list(records.values()), columns=columns)
+
+# Short names accepted by queryRuns, any index column name works too
+runIndexAliases = {
+    'video': 'Video Type',
+    'model': 'Machine model',
+    'os': 'OS version',
+    'boot': 'Boot arguments',
+    'date': 'Date',
+}
+
+def queryRuns(dfRuns, filters):
+    # Keep the runs matching every "key=pattern" filter, e.g. ["model=Macmini9,1", "os=20D*", "date=2021-02-*"].
+    # Patterns are shell style wildcards
+    selected = pd.Series(True, index=dfRuns.index)
+    for runFilter in filters:
+        key, separator, pattern = runFilter.partition('=')
+        column = runIndexAliases.get(key.strip().lower(), key.strip())
+        if not separator or column not in dfRuns:
+            raise ValueError(f"Unknown run filter {runFilter!r}, use key=pattern with key one of {', '.join(runIndexAliases)}")
+        selected &= dfRuns[column].map(lambda value: fnmatch.fnmatchcase(str(value), pattern.strip()))
+    return dfRuns[selected]
+
+# Run index column -> column of the runs table in the corpus database. Every log is a row keyed by log, run is its
+# video type like in the long table, so X.mp4.txt and X.webm.txt are two logs of the X run
+corpusRunColumns = {
+    'Video Type': 'run',
+    'Machine model': 'model',
+    'OS version': 'os',
+    'Boot arguments': 'boot',
+    'Boot time': 'boot_time',
+    'Date': 'date',
+    'Start': 'start',
+    'Duration (s)': 'duration',
+    'Samples': 'samples',
+    'path': 'path',
+    'size': 'size',
+    'mtime': 'mtime',
+    'version': 'version',
+}
+
+corpusSchema = """
+CREATE TABLE IF NOT EXISTS runs (log INTEGER PRIMARY KEY, run TEXT, model TEXT, os TEXT, boot TEXT, boot_time TEXT, date TEXT, start REAL,
+    duration REAL, samples INTEGER, path TEXT UNIQUE, size INTEGER, mtime INTEGER, version INTEGER, checks TEXT);
+CREATE TABLE IF NOT EXISTS samples (log INTEGER, run TEXT, sample INTEGER, time REAL, timestamp REAL, elapsed REAL, metric TEXT, component TEXT, value REAL);
+CREATE TABLE IF NOT EXISTS cores (log INTEGER, run TEXT, sample INTEGER, time REAL, core INTEGER, frequency REAL, idle_residency REAL, active_residency REAL);
+CREATE TABLE IF NOT EXISTS time_in_state (log INTEGER, run TEXT, histogram TEXT, frequency INTEGER, seconds REAL);
+CREATE INDEX IF NOT EXISTS samples_log ON samples (log);
+CREATE INDEX IF NOT EXISTS samples_run_time ON samples (run, metric, component, time);
+CREATE INDEX IF NOT EXISTS samples_metric ON samples (metric, component, run);
+CREATE INDEX IF NOT EXISTS cores_log ON cores (log);
+CREATE INDEX IF NOT EXISTS cores_run ON cores (run, core, time);
+CREATE INDEX IF NOT EXISTS time_in_state_log ON time_in_state (log);
+CREATE INDEX IF NOT EXISTS time_in_state_run ON time_in_state (run, histogram);
+CREATE INDEX IF NOT EXISTS runs_run ON runs (run);
+CREATE INDEX IF NOT EXISTS runs_os ON runs (os);
+CREATE INDEX IF NOT EXISTS runs_model ON runs (model);
+CREATE INDEX IF NOT EXISTS runs_date ON runs (date);
+"""
+
+# Bumped when the tables of the corpus change, an older corpus is dropped and written again
+corpusVersion = 5
+corpusTables = ['samples', 'cores', 'time_in_state', *sampleMetrics, 'runs']
+
+def corpusMetricTables():
+    # One wide table per metric (power, frequency, usage) with a column per component, like the chart dataframes.
+    # They are real tables indexed on (run, time), not views over samples, so a query only reads the rows of its runs
+    tables = []
+    for metric, components in sampleMetrics.items():
+        columns = ", ".join(f'"{component}" REAL' for component in components)
+        tables.append(f"CREATE TABLE IF NOT EXISTS {metric} (log INTEGER, run TEXT, sample INTEGER, time REAL, timestamp REAL, elapsed REAL, {columns});\n"
+            f"CREATE INDEX IF NOT EXISTS {metric}_run_time ON {metric} (run, time);\n"
+            f"CREATE INDEX IF NOT EXISTS {metric}_log ON {metric} (log);")
+    return "\n".join(tables)
+
+def storeCorpus(databasePath, dfSamples, dfSampleTimes, dfCores, dfTimeInState, dfRuns, checks):
+    # Parsed samples, per core samples, time in state and run metadata in a SQLite database so they can be queried
+    # without parsing anything. Only the runs whose log (size, mtime), parser version or sample checks changed are written again
+    with contextlib.closing(sqlite3.connect(databasePath)) as connection, connection:
+        if connection.execute("PRAGMA user_version").fetchone()[0] != corpusVersion:
+            # Every table and view, older corpora had the metrics as views
+            for name, kind in connection.execute("SELECT name, type FROM sqlite_master WHERE type IN ('table', 'view') AND name NOT LIKE 'sqlite_%'").fetchall():
+                connection.execute(f'DROP {kind.upper()} IF EXISTS "{name}"')
+            connection.execute(f"PRAGMA user_version = {corpusVersion}")
+        connection.executescript(corpusSchema + corpusMetricTables())
+        stored = {row[0]: row[1:] for row in connection.execute("SELECT path, size, mtime, version, checks FROM runs")}
+        changed = [record for record in dfRuns.to_dict('records')
+            if stored.get(record['path']) != (record['size'], record['mtime'], record['version'], checks)]
+
+        # Logs that are gone are removed, the ones filtered out with --where are kept. Rows go by log, so changing one
+        # log of a run doesn't touch its other logs
+        gone = [path for path in stored if not os.path.exists(path)]
+        for path in [record['path'] for record in changed] + gone:
+            for (log,) in connection.execute("SELECT log FROM runs WHERE path = ?", (path,)).fetchall():
+                for table in corpusTables:
+                    connection.execute(f"DELETE FROM {table} WHERE log = ?", (log,))
+        if not changed:
+            return 0
+
+        # Log id of every changed log, by file name like the log column of the sample table
+        logIds = {}
+        for record in changed:
+            cursor = connection.execute(f"INSERT INTO runs ({', '.join(corpusRunColumns.values())}, checks) VALUES ({', '.join('?' * (len(corpusRunColumns) + 1))})",
+                tuple(record[column] for column in corpusRunColumns) + (checks,))
+            logIds[os.path.basename(record['path'])] = cursor.lastrowid
+
+        # time is the one the parser gave each sample, so a sample dropped by the checks leaves a gap like on the charts.
+        # sample is numbered within its log, so the logs of a run can be written again one at a time
+        dfTimes = dfSampleTimes[dfSampleTimes['log'].isin(list(logIds))].copy()
+        dfTimes['logSample'] = dfTimes.groupby('log', observed=True).cumcount()
+        dfChanged = dfSamples[dfSamples['run'].isin(dfTimes['run'].unique())].merge(dfTimes, on=['run', 'sample'])
+        dfChanged['value'] = sampleValues(dfChanged['value'], dfChanged['metric'].astype(str))
+        connection.executemany("INSERT INTO samples VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", zip(
+            dfChanged['log'].map(logIds).tolist(), dfChanged['run'].astype(str).tolist(), dfChanged['logSample'].tolist(), dfChanged['time'].tolist(),
+            dfChanged['timestamp'].tolist(), dfChanged['elapsed'].tolist(), dfChanged['metric'].astype(str).tolist(), dfChanged['component'].astype(str).tolist(),
+            dfChanged['value'].tolist()))
+
+        # The same samples once more, one row per sample with a column per component
+        dfTimes = dfTimes.set_index(['log', 'logSample'])
+        for metric, components in sampleMetrics.items():
+            dfWide = dfChanged[dfChanged['metric'] == metric].set_index(['log', 'logSample', 'component'])['value'].unstack('component').reindex(columns=components)
+            dfInfo = dfTimes.reindex(dfWide.index)
+            connection.executemany(f"INSERT INTO {metric} VALUES ({', '.join('?' * (6 + len(components)))})", zip(
+                dfWide.index.get_level_values('log').map(logIds).tolist(), dfInfo['run'].astype(str).tolist(), dfWide.index.get_level_values('logSample').tolist(),
+                dfInfo['time'].tolist(), dfInfo['timestamp'].tolist(), dfInfo['elapsed'].tolist(), *(dfWide[component].tolist() for component in components)))
+
+        dfChanged = dfCores[dfCores['log'].isin(list(logIds))].merge(dfTimes.reset_index()[['run', 'sample', 'logSample']], on=['run', 'sample'])
+        connection.executemany("INSERT INTO cores VALUES (?, ?, ?, ?, ?, ?, ?, ?)", zip(
+            dfChanged['log'].map(logIds).tolist(), dfChanged['run'].astype(str).tolist(), dfChanged['logSample'].tolist(), dfChanged['time'].tolist(),
+            dfChanged['core'].tolist(), *(dfChanged[metric].astype(np.float64).tolist() for metric in coreMetrics)))
+        dfChanged = dfTimeInState[dfTimeInState['log'].isin(list(logIds))]
+        connection.executemany("INSERT INTO time_in_state VALUES (?, ?, ?, ?, ?)", zip(
+            dfChanged['log'].map(logIds).tolist(), dfChanged['run'].astype(str).tolist(), dfChanged['histogram'].tolist(),
+            dfChanged['frequency'].tolist(), dfChanged['seconds'].tolist()))
+        return len(changed)
+
+def queryCorpus(databasePath, sql):
+    # Read only, so a query can't change the corpus
+    with contextlib.closing(sqlite3.connect(f"file:{databasePath}?mode=ro", uri=True)) as connection:
+        return pd.read_sql_query(sql, connection)
+
+def parseLogTask(path, cacheFolder=None):
+    # One log file per task. Runs in a worker process so it only takes and returns picklable values
+    with traceStage('parse log', log=os.path.basename(path)) as stage:
+        if cacheFolder:
+            frames = loadCacheEntry(cacheFolder, path)
+            if frames is not None:
+                stage['details']['cached'] = True
+                return frames
+
+        frames = parseLogFile(path, videoTypeFromFileName(os.path.basename(path)))
+
+        if cacheFolder:
+            storeCacheEntry(cacheFolder, path, frames)
+        return frames
+
+# Invariants every sample should hold. Each check takes the wide frames of one run and returns a boolean array
+# of the samples breaking it, computed over whole columns so millions of samples take NumPy time.
+# Power values are whole mW, the tolerance absorbs their rounding
+def checkMissingValues(run, tolerance):
+    # A metric line missing from the sample
+    return (run['power'][list(powerColumns)].isna().any(axis=1) | run['frequency'][list(frequencyColumns)].isna().any(axis=1)
+        | run['usage'][list(usageColumns)].isna().any(axis=1)).to_numpy()
+
+def checkNegativePower(run, tolerance):
+    return (run['power'][list(powerColumns)] < 0).any(axis=1).to_numpy()
+
+def checkResidencyRange(run, tolerance):
+    usage = run['usage'][list(usageColumns)]
+    residencies = run['cores'][:, :, [coreMetricIndex['idle residency'], coreMetricIndex['active residency']]]
+    return ((usage < 0) | (usage > 100)).any(axis=1).to_numpy() | ((residencies < 0) | (residencies > 100)).any(axis=(1, 2))
+
+def checkCoreResidencySum(run, tolerance):
+    # idle + active residency of every core should be 100% (both are printed with 2 decimals)
+    total = run['cores'][:, :, coreMetricIndex['idle residency']] + run['cores'][:, :, coreMetricIndex['active residency']]
+    return (np.abs(total - 100) > 0.1).any(axis=1)
+
+def checkClustersTotal(run, tolerance):
+    # E-Cluster + P-Cluster <= Clusters Total
+    dfPower = run['power']
+    return (dfPower['Efficiency Cluster'] + dfPower['Performance Cluster'] > dfPower['Cluster'] + tolerance).to_numpy()
+
+def checkPackageTotal(run, tolerance):
+    # Package >= Clusters Total + DRAM + GPU
+    dfPower = run['power']
+    return (dfPower['Package'] + tolerance < dfPower['Cluster'] + dfPower['DRAM'] + dfPower['GPU']).to_numpy()
+
+def checkElapsed(run, tolerance):
+    # The time axis and the energy are built from the sample durations
+    elapsed = run['power']['elapsed'].to_numpy()
+    return ~(elapsed > 0)
+
+sampleChecks = {
+    'missing values': checkMissingValues,
+    'negative power': checkNegativePower,
+    'residency out of range': checkResidencyRange,
+    'idle + active != 100%': checkCoreResidencySum,
+    'clusters > clusters total': checkClustersTotal,
+    'package < parts': checkPackageTotal,
+    'bad elapsed': checkElapsed,
+}
+
+# Repairs of the broken samples (bad is the boolean array of its check), in the order of sampleChecks so the
+# totals are repaired after the parts they add up. Checks without a repair drop the sample in repair mode
+def repairMissingValues(run, bad):
+    for metric, columns in (('power', powerColumns), ('frequency', frequencyColumns), ('usage', usageColumns)):
+        run[metric][list(columns)] = run[metric][list(columns)].interpolate(limit_direction='both')
+
+def repairNegativePower(run, bad):
+    run['power'][list(powerColumns)] = run['power'][list(powerColumns)].clip(lower=0)
+
+def repairResidencyRange(run, bad):
+    run['usage'][list(usageColumns)] = run['usage'][list(usageColumns)].clip(0, 100)
+    for metric in ('idle residency', 'active residency'):
+        np.clip(run['cores'][:, :, coreMetricIndex[metric]], 0, 100, out=run['cores'][:, :, coreMetricIndex[metric]])
+
+def repairCoreResidencySum(run, bad):
+    run['cores'][bad, :, coreMetricIndex['idle residency']] = 100 - run['cores'][bad, :, coreMetricIndex['active residency']]
+
+def repairClustersTotal(run, bad):
+    dfPower = run['power']
+    dfPower.loc[bad, 'Cluster'] = dfPower.loc[bad, 'Efficiency Cluster'] + dfPower.loc[bad, 'Performance Cluster']
+
+def repairPackageTotal(run, bad):
+    dfPower = run['power']
+    dfPower.loc[bad, 'Package'] = dfPower.loc[bad, 'Cluster'] + dfPower.loc[bad, 'DRAM'] + dfPower.loc[bad, 'GPU']
+
+sampleRepairs = {
+    'missing values': repairMissingValues,
+    'negative power': repairNegativePower,
+    'residency out of range': repairResidencyRange,
+    'idle + active != 100%': repairCoreResidencySum,
+    'clusters > clusters total': repairClustersTotal,
+    'package < parts': repairPackageTotal,
+}
+
+def failedChecks(run, tolerance):
+    return {name: check(run, tolerance) for name, check in sampleChecks.items()}
+
+def checkRun(result, mode='flag', tolerance=2):
+    # Runs every check over the frames of one parsed log (as returned by parseLogTask). flag only counts the broken
+    # samples, drop removes them, repair fixes what it can and drops the rest. Returns the checked result and
+    # the number of samples breaking each check, plus the repaired and dropped counts
+    dfPower, dfFrequency, dfUsage, dfSummary, coreArray, histograms = result
+    run = {'power': dfPower, 'frequency': dfFrequency, 'usage': dfUsage, 'cores': coreArray}
+    failed = failedChecks(run, tolerance)
+    counts = {name: int(bad.sum()) for name, bad in failed.items()}
+    bad = np.logical_or.reduce(list(failed.values()))
+    counts.update(repaired=0, dropped=0)
+    if mode == 'flag' or not bad.any():
+        return result, counts
+
+    if mode == 'repair':
+        run = {'power': dfPower.copy(), 'frequency': dfFrequency.copy(), 'usage': dfUsage.copy(), 'cores': coreArray.copy()}
+        # Each check runs again right before its repair, an earlier repair can break it (a raised Clusters Total
+        # pushes the parts over the Package)
+        for name, repair in sampleRepairs.items():
+            broken = sampleChecks[name](run, tolerance)
+            if broken.any():
+                repair(run, broken)
+        run['power']['Other'] = run['power']['Package'] - (run['power']['Cluster'] + run['power']['DRAM'] + run['power']['GPU'])
+        # Whatever a repair couldn't fix (or broke) is dropped
+        stillBad = np.logical_or.reduce(list(failedChecks(run, tolerance).values()))
+        counts['repaired'] = int((bad & ~stillBad).sum())
+        bad = stillBad
+
+    # The kept samples keep their time, so a dropped sample leaves a gap instead of shortening the run
+    keep = ~bad
+    counts['dropped'] = int(bad.sum())
+    dfPower, dfFrequency, dfUsage = (run[metric][keep].reset_index(drop=True) for metric in ('power', 'frequency', 'usage'))
+    histograms = {name: histogram[keep].reset_index(drop=True) for name, histogram in histograms.items()}
+    return (dfPower, dfFrequency, dfUsage, dfSummary, run['cores'][keep], histograms), counts
+
+def printSampleChecks(checks, mode):
+    # Broken samples per run and check, only the runs and checks with any
+    dfChecks = pd.DataFrame(checks).T
+    failing = dfChecks.loc[dfChecks[list(sampleChecks)].sum(axis=1) > 0]
+    if failing.empty:
+        print("Every sample passed the checks")
+        return
+    columns = [name for name in sampleChecks if failing[name].any()] + (['repaired'] if mode == 'repair' else []) + (['dropped'] if mode != 'flag' else [])
+    print(f"Samples failing the checks ({mode}):")
+    print(failing[columns].to_string())
+
+def logPaths(pathLogsFolder):
+    # Get the list of all log files in the logs folder
+    powerLogsPaths = []
+    for logsFile in sorted(os.listdir(pathLogsFolder)):
+        if not os.path.isfile(pathLogsFolder + logsFile):
+            print('File does not exist.')
+            continue
+        powerLogsPaths.append(pathLogsFolder + logsFile)
+    return powerLogsPaths
+
+def loadLogs(pathLogsFolder, workers, cacheFolder=None, paths=None, checkMode='flag', powerTolerance=2):
+    # Every log of the folder, or only the given paths of it. The samples are checked after the cache, so
+    # cached logs hold what was parsed and changing the check mode doesn't need a new parse
+    powerLogsPaths = logPaths(pathLogsFolder) if paths is None else list(paths)
+
+    # Parse the content and build Data Frames, one set of frames per file
+    if workers > 1 and len(powerLogsPaths) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(powerLogsPaths))) as pool:
+            results = tracedMap(pool, parseLogTask, powerLogsPaths, [cacheFolder] * len(powerLogsPaths))
+    else:
+        results = [parseLogTask(path, cacheFolder) for path in powerLogsPaths]
+
+    if checkMode != 'off' and results:
+        with traceStage('checks', mode=checkMode):
+            checked = [checkRun(result, checkMode, powerTolerance) for result in results]
+        results = [result for result, counts in checked]
+        printSampleChecks({os.path.basename(path): counts for path, (result, counts) in zip(powerLogsPaths, checked)}, checkMode)
+
+    # Log file of every sample in the sample table, X.mp4.txt and X.webm.txt are both the X run
+    logNames = [os.path.basename(path) for path in powerLogsPaths]
+    if not results:
+        dfSamples, dfSampleTimes = tidySamples(*(pd.DataFrame(columns=list(sampleMetrics[metric]) + sampleInfoColumns) for metric in sampleMetrics))
+        dfSampleTimes.insert(1, 'log', pd.Categorical([], categories=logNames))
+        return dfSamples, dfSampleTimes, pd.DataFrame(), concatCoreArrays([]), {}
+
+    # Every run goes to the long table as soon as it is loaded, then all of them are concatenated once at the end
+    # instead of growing the frames file by file
+    with traceStage('concatenate', logs=len(results)):
+        runs = list(dict.fromkeys(videoType for result in results for videoType in result[0]['Video Type'].unique()))
+        tables = []
+        firstSamples = np.zeros(len(runs), dtype=np.int32)
+        for index, result in enumerate(results):
+            samples, times = tidySamples(*result[:3], runs=runs)
+            # The samples of a run split over several logs are numbered on from the earlier logs, so (run, sample) stays unique
+            samples['sample'] += firstSamples[samples['run'].cat.codes]
+            times['sample'] += firstSamples[times['run'].cat.codes]
+            firstSamples += np.bincount(times['run'].cat.codes, minlength=len(runs)).astype(np.int32)
+            times.insert(1, 'log', pd.Categorical.from_codes(np.full(len(times), index), categories=logNames))
+            tables.append((samples, times))
+        dfSamples = pd.concat([samples for samples, times in tables], ignore_index=True)
+        dfSampleTimes = pd.concat([times for samples, times in tables], ignore_index=True)
+        dfSummary = pd.concat([result[3] for result in results], ignore_index=True)
+        coreArray = concatCoreArrays([result[4] for result in results])
+        histograms = concatHistograms([(result[5], len(result[0])) for result in results])
+
+    return dfSamples, dfSampleTimes, dfSummary, coreArray, histograms
+
+def lttbIndices(x, y, points):
+    # Largest-Triangle-Three-Buckets: keeps the first and last sample and, in every bucket in between, the sample
+    # forming the largest triangle with the previous pick and the average of the next bucket
+    points = max(points, 3)
+    edges = np.linspace(1, len(y) - 1, points - 1).astype(np.int64)
+    picked = np.empty(points, dtype=np.int64)
+    picked[0], picked[-1] = 0, len(y) - 1
+
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        nextStart, nextEnd = end, edges[bucket + 2] if bucket + 2 < len(edges) else len(y)
+        averageX, averageY = x[nextStart:nextEnd].mean(), y[nextStart:nextEnd].mean()
+        previousX, previousY = x[picked[bucket]], y[picked[bucket]]
+        areas = np.abs((previousX - averageX) * (y[start:end] - previousY) - (previousX - x[start:end]) * (averageY - previousY))
+        picked[bucket + 1] = start + np.argmax(areas)
+
+    return picked
+
+def minMaxIndices(x, y, points):
+    # Minimum and maximum of every bucket, so spikes survive whatever the capture length. The first and last
+    # sample are always kept, like with lttb, so the trace spans the whole capture
+    buckets = max(points // 2, 1)
+    edges = np.linspace(0, len(y), buckets + 1).astype(np.int64)
+    bucketIds = np.repeat(np.arange(buckets), np.diff(edges))
+    order = np.lexsort((y, bucketIds))
+    return np.unique(np.concatenate(([0, len(y) - 1], order[edges[:-1]], order[edges[1:] - 1])))
+
+downsamplers = {'lttb': lttbIndices, 'minmax': minMaxIndices}
+
+def downsampleSamples(df, columns, points, method='lttb'):
+    # Bound the samples drawn per video type. Every column is downsampled on its own and the rows picked for
+    # any of them are kept, so each series gets at least its own picks while the frame stays wide
+    if not points or df.empty:
+        return df
+
+    pick = downsamplers[method]
+    positions = []
+    for indices in df.groupby('Video Type', sort=False).indices.values():
+        if len(indices) <= points:
+            positions.append(indices)
+            continue
+        x = df['time'].to_numpy(dtype=np.float64)[indices]
+        picked = [pick(x, np.nan_to_num(df[column].to_numpy(dtype=np.float64)[indices]), points) for column in columns]
+        positions.append(indices[np.unique(np.concatenate(picked))])
+
+    return df.iloc[np.sort(np.concatenate(positions))]
+
+# Styling shared by every chart
+chartFont = "SF Pro Display, Roboto, Droid Sans, Arial"
+chartBackground = '#191C1F'
+componentColors = {
+    "Efficiency Cluster": "#73A4FF",
+    "Performance Cluster": "#FF715A",
+    "DRAM": "#C590FF",
+    "GPU": "#01F0B0",
+    "Other": "#FEAF73"
+}
+packageColors = {"Package": "#57FFBC"}
+powerComponents = ['Efficiency Cluster', 'Performance Cluster', 'DRAM', 'GPU', 'Other']
+clusterComponents = ['Efficiency Cluster', 'Performance Cluster', 'GPU']
+
+# How each dataframe is labelled, hovered and annotated in the charts
+chartMetrics = {
+    'power': {'label': "Power Consumption (mW)", 'lineHover': '%{y} (mW)', 'barHover': '%{y:.0f} (mW)', 'barText': '%{y:.0f}', 'tickSuffix': None},
+    'frequency': {'label': "Frequency (MHz)", 'lineHover': '%{y} MHz', 'barHover': '%{y:.0f} (Hz)', 'barText': '%{y:.0f}', 'tickSuffix': None},
+    'usage': {'label': "Usage (%)", 'lineHover': '%{y:.0f} %', 'barHover': '%{y:.0f} (%)', 'barText': '%{y:.0f} %', 'tickSuffix': '%'},
+}
+
+# Every chart we publish. A group is a set of video types (renamed for display) that share a subtitle,
+# each of its figures is rendered from the same filtered data. Figure kinds:
+#   timeline    - metric over time, one column per video type (or one line per video type with colorByVideoType)
+#   rows        - metric over time, one row per video type
+#   plain       - unstyled rows version, html only
+#   bars        - time weighted average per component, grouped by video type
+#   packageBar  - time weighted average package power, one horizontal bar per video type
+# watermark is (x, y) of the //singhkays.com annotation and logo is (x, y, size) of the logo image
+chartGroups = [
+    {
+        'videoTypes': ["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"],
+        'rename': {},
+        'subtitle': "Apple Mac Mini M1 | VLC 3.0.12.1 (local files) | MacOS 11.2.2",
+        'figures': [
+            {'kind': 'timeline', 'metric': 'power', 'columns': ['Package'], 'area': True, 'legend': None, 'output': 'plotly-power-package',
+                'title': "Total Package Power Consumption over Time", 'watermark': (1, 0.79), 'logo': (-0.12, 1.17, 0.2)},
+            {'kind': 'rows', 'metric': 'power', 'columns': powerComponents, 'output': 'plotly-power-total',
+                'title': "Power Consumption over Time", 'height': 1000, 'watermark': (0.01, 0.965), 'logo': (-0.119, 1.038, 0.065)},
+            {'kind': 'plain', 'metric': 'power', 'columns': powerComponents, 'output': 'plotly-power-total-2', 'height': 1000},
+            {'kind': 'bars', 'metric': 'power', 'columns': powerComponents, 'output': 'plotly-power-average',
+                'title': "Average Power Consumption", 'height': 400, 'titleY': 0.93, 'barWidth': 0.11,
+                'colors': {column: componentColors[column] for column in ['Efficiency Cluster', 'Performance Cluster', 'DRAM', 'GPU']},
+                'watermark': (0.99, 0.86), 'logo': (-0.12, 1.12, 0.145)},
+            {'kind': 'packageBar', 'output': 'plotly-power-average-total', 'title': "Average Power Consumption", 'background': '#181F26',
+                'order': ["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-VP9", "FHD-H264"], 'watermark': (0.99, 0.17), 'logo': (-0.165, 1.099, 0.29)},
+            {'kind': 'timeline', 'metric': 'frequency', 'columns': clusterComponents, 'output': 'plotly-frequency',
+                'title': "Frequency over Time", 'watermark': (1, 0.83)},
+            {'kind': 'bars', 'metric': 'frequency', 'columns': clusterComponents, 'output': 'plotly-frequency-average',
+                'title': "Average Frequency", 'yRange': [0, 1650], 'watermark': (0.99, 0.96)},
+            {'kind': 'timeline', 'metric': 'usage', 'columns': clusterComponents, 'output': 'plotly-usage',
+                'title': "Usage over Time", 'watermark': (1, 0.9)},
+            {'kind': 'bars', 'metric': 'usage', 'columns': clusterComponents, 'output': 'plotly-usage-average',
+                'title': "Average Usage", 'yRange': [0, 29], 'watermark': (0.99, 0.96)},
+        ],
     },
-    labels={"value": "Power Consumption (mW)"}, 
-    category_orders={"Video Type": ["4K-VP9", "4K-AV1",  "FHD-AV1", "FHD-H264", "FHD-VP9"]})
-
-    fig.update_yaxes(title_font = dict(size=12), title_font_color = "#707070", color="#707070",  tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424') #, range=[0, 1100])
-    fig.update_xaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(texttemplate='%{y:.0f}', textfont= dict(size=8), width=[0.11, 0.11, 0.11, 0.11, 0.11])
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Power Consumption</b> <br> <sup> Apple Mac Mini M1 | VLC 3.0.12.1 (local files) | MacOS 11.2.2 </sup>",
-            'y':0.93,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, b = 0, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    texts = [barDf['Efficiency Cluster'], barDf['Performance Cluster'], barDf['DRAM'], barDf['GPU'], barDf['Other']]
-    for i, t in enumerate(texts):
-        fig.data[i].text = t
-        fig.data[i].textposition = 'outside'
-
-    # fig.update_traces(texttemplate='%{text:.2s}', textposition='outside')
-    # fig.update_layout(uniformtext_minsize=7, uniformtext_mode='hide')
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.12,
-            sizex=0.145, sizey=0.145,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    # Update just the layout properites with relatout method e.g. barmode
-    # fig.update_layout(
-    #     updatemenus=[
-    #         dict(
-    #             type="buttons",
-    #             buttons=[
-    #                 dict(label="Grouped",
-    #                     method="relayout",
-    #                     args = [{"barmode": "group"} ]),
-    #                 dict(label="Stacked",
-    #                     method="relayout",
-    #                     args = [{"barmode": "stack"}, {"autosize": "True"} ])
-    #             ]
-    #         )
-    #     ]
-    # )
-
-    # TODO: Figure out the fix for https://github.com/plotly/plotly.py/issues/3120 
-    # Update the Layout + Trace properties
-    # fig.update_layout(
-    #     updatemenus=[
-    #         dict(
-    #             type="dropdown",
-    #             # direction="right",
-    #             active=0,
-    #             x=1.035,
-    #             y=1.27,
-    #             showactive = True,
-    #             buttons=list([
-    #                 dict(label="Grouped",
-    #                     method="update",
-    #                     args=[{"width": [0.11]},
-    #                         {"barmode": "group"}]),
-    #                 dict(label="Stacked",
-    #                     method="update",
-    #                     args=[{"width": [0.6]},
-    #                         {"barmode": "stack"}])
-    #             ]),
-    #             bgcolor = "#222",
-    #             bordercolor = "#FFF",
-    #             borderwidth = 0.5
-    #         )
-    #     ])
-
-    # fig.add_annotation(text="Bar Mode:",
-    # xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-    # x=0.89, y=1.25, showarrow=False, opacity=0.8, font=dict(size=13))
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=0.99, y=0.86, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-power-average.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-average.svg")
-
-    # HORIZONTAL BAR CHART FOR Total Average
-    barDf = (dfPower.loc[dfPower["Video Type"].isin(["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, y='Video Type', x=['Package'], template='plotly_dark', orientation='h', hover_name = 'Video Type',  width = 700, height = 250, #barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn, 
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={"Package": "#57FFBC"},
-    labels={"value": "Power Consumption (mW)"}, 
-    category_orders={"Video Type": ["4K-VP9", "4K-AV1",  "FHD-AV1", "FHD-VP9", "FHD-H264"]})
-
-    fig.update_xaxes(zeroline = True, title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
-    fig.update_yaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{x:.0f} (mW)', texttemplate='%{x:.0f} mW', textfont= dict(size=11))
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        showlegend = False, font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Power Consumption</b> <br> <sup> Apple Mac Mini M1 | VLC 3.0.12.1 (local files) | MacOS 11.2.2 </sup>",
-            'y':0.90,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, b = 15, t = 60),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#181F26',
-        paper_bgcolor ='#181F26'
-    )
-
-    texts = [barDf['Package']]
-    for i, t in enumerate(texts):
-        fig.data[i].text = t
-        fig.data[i].textposition = 'inside'
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=0.99, y=0.17, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.165, y=1.099,
-            sizex=0.29, sizey=0.29,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-power-average-total.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-average-total.svg")
-
-
-    # Figure for CPU, GPU Frequency over time
-    fig = px.line(dfFrequency.loc[dfFrequency["Video Type"].isin(["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"])], x='time', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', 
-    width = 700, height = 350, facet_col='Video Type', line_shape= "spline", render_mode = "svg",  facet_col_wrap = 5,
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
+    {
+        'videoTypes': ["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"],
+        'rename': {'4K-VP9': 'VLC-SW', "Chrome-HW-YT-4K": "Chrome-HW", "Safari-HW-YT-4K": "Safari-HW"},
+        'subtitle': "Apple Mac Mini M1 | YouTube VP9 4K SDR | MacOS 11.2.2",
+        'figures': [
+            {'kind': 'timeline', 'metric': 'power', 'columns': ['Package'], 'area': True, 'legend': None, 'output': 'plotly-power-package-browser',
+                'title': "Total Package Power Consumption over Time", 'watermark': (1.05, 1.3), 'logo': (-0.12, 1.17, 0.2)},
+            {'kind': 'rows', 'metric': 'power', 'columns': powerComponents, 'output': 'plotly-power-total-browser',
+                'title': "Power Consumption over Time", 'height': 900, 'order': ["VLC-SW", "Chrome-SW", "Safari-HW", "Chrome-HW"],
+                'watermark': (0.85, 0.75), 'logo': (-0.12, 1.04, 0.067)},
+            {'kind': 'bars', 'metric': 'power', 'columns': powerComponents, 'output': 'plotly-power-average-browser',
+                'title': "Average Power Consumption", 'height': 400, 'titleY': 0.93, 'barWidth': 0.11, 'yRange': [0, 1100],
+                'watermark': (0.99, 0.86), 'logo': (-0.12, 1.12, 0.145)},
+            {'kind': 'packageBar', 'output': 'plotly-power-average-total-browser', 'title': "Average Power Consumption",
+                'order': ["Safari-HW", "Chrome-HW", "Chrome-SW", "VLC-SW"], 'watermark': (0.99, 1), 'logo': (-0.18, 1.099, 0.29)},
+            {'kind': 'timeline', 'metric': 'frequency', 'columns': clusterComponents, 'output': 'plotly-frequency-browser',
+                'title': "Frequency over Time", 'watermark': (1.05, 1.3)},
+            {'kind': 'bars', 'metric': 'frequency', 'columns': clusterComponents, 'output': 'plotly-frequency-average-browser',
+                'title': "Average Frequency", 'yRange': [0, 1650], 'watermark': (0.99, 1.25)},
+            {'kind': 'timeline', 'metric': 'usage', 'columns': clusterComponents, 'output': 'plotly-usage-browser',
+                'title': "Usage over Time", 'watermark': (1.05, 1.3)},
+            {'kind': 'bars', 'metric': 'usage', 'columns': clusterComponents, 'output': 'plotly-usage-average-browser',
+                'title': "Average Usage", 'yRange': [0, 32], 'watermark': (1, 1.25)},
+        ],
     },
-    labels={"value": "Frequency (MHz)", "time": "Time (s)"},
-    category_orders={"Video Type": ["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"]})
-    
-    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']:
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=11)
-    
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
-    fig.update_xaxes(showgrid=False, title_font = dict(size=10), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    fig.update_traces(hovertemplate='%{y} MHz', line_smoothing = 1.3)
-    fig.update_layout(legend_title_text='', autosize = True, hovermode="x", 
-        legend=dict(orientation="h", yanchor="top", y=-0.3, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Frequency over Time</b> <br> <sup> Apple Mac Mini M1 | VLC 3.0.12.1 (local files) | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 50, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1, y=0.83, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.125, y=1.19,
-            sizex=0.22, sizey=0.22,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    fig.write_html("outputs/plotly-frequency.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-frequency.svg")
-
-   # BAR CHART FOR Averages by component
-    barDf = (dfFrequency.loc[dfFrequency["Video Type"].isin(["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, x='Video Type', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', orientation='v', hover_name = 'Video Type',
-    width = 700, height = 350, barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn,
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
+    {
+        'videoTypes': ["Safari (H.265 1080p)", "Chrome (VP9 720p)"],
+        'rename': {"Safari-Netflix-1080p": "Safari (H.265 1080p)", "Chrome-Netflix-720p": "Chrome (VP9 720p)"},
+        'subtitle': "Apple Mac Mini M1 | Netflix Queen's Gambit | MacOS 11.2.2",
+        'figures': [
+            {'kind': 'timeline', 'metric': 'power', 'columns': ['Package'], 'legend': 'above', 'output': 'plotly-power-package-netflix',
+                'title': "Total Package Power Consumption over Time", 'colorByVideoType': {"Safari (H.265 1080p)": "#19C0FC", "Chrome (VP9 720p)": "#FAD108"},
+                'watermark': (1.05, 1.1), 'logo': (-0.125, 1.18, 0.21)},
+            {'kind': 'rows', 'metric': 'power', 'columns': powerComponents, 'output': 'plotly-power-total-netflix',
+                'title': "Power Consumption over Time", 'height': 500, 'titleY': 0.94, 'facetLabelOffset': 0.088,
+                'yaxes': dict(title_font = dict(size=10)), 'xaxes': dict(title_font = dict(size=11)),
+                'watermark': (0.8, -0.1), 'logo': (-0.12, 1.09, 0.12)},
+            {'kind': 'bars', 'metric': 'power', 'columns': powerComponents, 'output': 'plotly-power-average-netflix',
+                'title': "Average Power Consumption", 'height': 400, 'titleY': 0.93, 'barWidth': 0.11, 'yRange': [0, 65],
+                'watermark': (0.99, 0.9), 'logo': (-0.12, 1.12, 0.145)},
+            {'kind': 'packageBar', 'output': 'plotly-power-average-total-netflix', 'title': "Average Power Consumption", 'height': 200, 'titleY': 0.87,
+                'order': ["Chrome (VP9 720p)", "Safari (H.265 1080p)"], 'watermark': (1.02, 1.5), 'logo': (-0.27, 1.16, 0.49)},
+            {'kind': 'timeline', 'metric': 'frequency', 'columns': clusterComponents, 'output': 'plotly-frequency-netflix',
+                'title': "Frequency over Time", 'watermark': (1.05, 1.3)},
+            {'kind': 'bars', 'metric': 'frequency', 'columns': clusterComponents, 'output': 'plotly-frequency-average-netflix',
+                'title': "Average Frequency", 'yRange': [0, 1250], 'watermark': (0.99, 1.25)},
+            {'kind': 'timeline', 'metric': 'usage', 'columns': clusterComponents, 'output': 'plotly-usage-netflix',
+                'title': "Usage over Time", 'watermark': (1.05, 1.3)},
+            {'kind': 'bars', 'metric': 'usage', 'columns': clusterComponents, 'output': 'plotly-usage-average-netflix',
+                'title': "Average Usage", 'yRange': [0, 20], 'watermark': (1, 1.25)},
+        ],
     },
-    labels={"value": "Frequency (MHz)"}, 
-    category_orders={"Video Type": ["4K-VP9", "4K-AV1",  "FHD-AV1", "FHD-H264", "FHD-VP9"]})
-
-    fig.update_yaxes(title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', range=[0, 1650])
-    fig.update_xaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{y:.0f} (Hz)', texttemplate='%{y:.0f}', textfont= dict(size=8), width=[0.15, 0.15, 0.15, 0.15, 0.15])
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Frequency</b> <br> <sup> Apple Mac Mini M1 | VLC 3.0.12.1 (local files) | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, b = 0, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    texts = [barDf['Efficiency Cluster'], barDf['Performance Cluster'], barDf['GPU']]
-    for i, t in enumerate(texts):
-        fig.data[i].text = t
-        fig.data[i].textposition = 'outside'
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=0.99, y=0.96, showarrow=False,  font=dict(size=14, color='#707070'))
+]
+
+def chartTitle(spec, group, y):
+    return {
+        'text': f"<b>{spec['title']}</b> <br> <sup> {group['subtitle']} </sup>",
+        'y': y,
+        'x': 0.54,
+        'xanchor': 'center',
+        'yanchor': 'top',
+        'font': dict(size=18, color='#FFF')}
+
+def chartLegend(position):
+    # 'above' the plot, 'below' it or None to hide the legend
+    if position == 'above':
+        return dict(legend_title_text='', legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5))
+    if position == 'below':
+        return dict(legend_title_text='', legend=dict(orientation="h", yanchor="top", y=-0.3, xanchor="center", x=0.5))
+    return dict(showlegend = False)
+
+def renderTimeline(data, spec, group):
+    import plotly.express as px
+    metric = chartMetrics[spec['metric']]
+    chartArguments = dict(x='time', y=spec['columns'], template='plotly_dark', width = 700, height = spec.get('height', 350),
+        line_shape= "spline", labels={"value": metric['label'], "time": "Time (s)"})
+
+    if spec.get('colorByVideoType'):
+        chartArguments.update(color='Video Type', color_discrete_map=spec['colorByVideoType'])
+    else:
+        chartArguments.update(facet_col='Video Type', facet_col_wrap = 5,
+            color_discrete_map=packageColors if spec['columns'] == ['Package'] else componentColors,
+            category_orders={"Video Type": spec.get('order', group['videoTypes'])})
 
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.15,
-            sizex=0.18, sizey=0.18,
-            xanchor="left", yanchor="bottom"
-        )
-    )
+    if spec.get('area'):
+        fig = px.area(data[spec['metric']], **chartArguments)
+    else:
+        fig = px.line(data[spec['metric']], render_mode = "svg", **chartArguments)
 
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-frequency-average.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-frequency-average.svg")
-
-    # Figure for CPU, GPU Usage over time
-    fig = px.line(dfUsage.loc[dfUsage["Video Type"].isin(["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"])], x='time', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', 
-    width = 700, height = 350, facet_col='Video Type', line_shape= "spline", render_mode = "svg",  facet_col_wrap = 5,
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    # color_discrete_sequence= px.colors.sequential.Burgyl,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Usage (%)", "time": "Time (s)"},
-    category_orders={"Video Type": ["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"]})
-    
     fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
     for annotation in fig['layout']['annotations']:
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=11)
-    
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', ticksuffix = "%")
-    fig.update_xaxes(showgrid=False, title_font = dict(size=10), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    fig.update_traces(hovertemplate='%{y:.0f} %', line_smoothing = 1.3)
-    fig.update_layout(legend_title_text='', autosize = True, hovermode="x", 
-        legend=dict(orientation="h", yanchor="top", y=-0.3, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Usage over Time</b> <br> <sup> Apple Mac Mini M1 | VLC 3.0.12.1 (local files) | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 50, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1, y=0.9, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.125, y=1.19,
-            sizex=0.22, sizey=0.22,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    fig.write_html("outputs/plotly-usage.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-usage.svg")
-
- # BAR CHART FOR Averages by component
-    barDf = (dfUsage.loc[dfUsage["Video Type"].isin(["4K-VP9", "4K-AV1", "FHD-AV1", "FHD-H264", "FHD-VP9"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, x='Video Type', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', orientation='v', hover_name = 'Video Type',
-    width = 700, height = 350, barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn,
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Usage (%)"}, 
-    category_orders={"Video Type": ["4K-VP9", "4K-AV1",  "FHD-AV1", "FHD-H264", "FHD-VP9"]})
-
-    fig.update_yaxes(title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', range=[0, 29], ticksuffix = "%")
-    fig.update_xaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{y:.0f} (%)', texttemplate='%{y:.0f} %', textfont= dict(size=8), width=[0.15, 0.15, 0.15, 0.15, 0.15])
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Usage</b> <br> <sup> Apple Mac Mini M1 | VLC 3.0.12.1 (local files) | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, b = 0, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    texts = [barDf['Efficiency Cluster'], barDf['Performance Cluster'], barDf['GPU']]
-    for i, t in enumerate(texts):
-        fig.data[i].text = t
-        fig.data[i].textposition = 'outside'
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=0.99, y=0.96, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.15,
-            sizex=0.18, sizey=0.18,
-            xanchor="left", yanchor="bottom"
-        )
-    )
+        annotation['font'] = dict(family=chartFont, size=11)
 
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-usage-average.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-usage-average.svg")
-
-def buildYouTubeCharts(dfPower, dfFrequency, dfUsage, config, kLogo):
-    dfPower["Video Type"].replace({'4K-VP9':'VLC-SW', "Chrome-HW-YT-4K":"Chrome-HW", "Safari-HW-YT-4K":"Safari-HW"}, inplace=True)
-    dfFrequency["Video Type"].replace({'4K-VP9':'VLC-SW', "Chrome-HW-YT-4K":"Chrome-HW", "Safari-HW-YT-4K":"Safari-HW"}, inplace=True)
-    dfUsage["Video Type"].replace({'4K-VP9':'VLC-SW', "Chrome-HW-YT-4K":"Chrome-HW", "Safari-HW-YT-4K":"Safari-HW"}, inplace=True)
-
-    # Figure for Package Power Over Time
-    fig = px.area(dfPower.loc[dfPower["Video Type"].isin(["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"])], x='time', y=['Package'], template='plotly_dark', 
-    width = 700, height = 350, facet_col='Video Type', line_shape= "spline", facet_col_wrap = 5,
-    labels={"value": "Power Consumption (mW)", "time": "Time (s)"}, color_discrete_map={"Package": "#57FFBC"},
-    category_orders={"Video Type": ["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"]})
-    
-    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']:
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=11)
-    
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
+    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', ticksuffix = metric['tickSuffix'])
     fig.update_xaxes(showgrid=False, title_font = dict(size=10), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    fig.update_traces(hovertemplate='%{y} (mW)', line_smoothing = 1.3)
-    fig.update_layout(autosize = True, hovermode="x", 
-        showlegend = False, font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Total Package Power Consumption over Time</b> <br> <sup> Apple Mac Mini M1 | YouTube VP9 4K SDR | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
+    fig.update_traces(hovertemplate=metric['lineHover'], line_smoothing = 1.3)
+    fig.update_layout(autosize = True, hovermode="x", font = dict(family=chartFont),
+        title=chartTitle(spec, group, spec.get('titleY', 0.92)),
         margin = dict(r = 50, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1.05, y=1.3, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.17,
-            sizex=0.2, sizey=0.2,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    fig.write_html("outputs/plotly-power-package-browser.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-package-browser.svg")
-
-    # Figure for Total Power Over Time
-    fig = px.line(dfPower.loc[dfPower["Video Type"].isin(["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"])], x='time', y=['Efficiency Cluster', 'Performance Cluster', 'DRAM', 'GPU', 'Other'], template='plotly_dark', 
-    width = 700, height = 900, facet_row='Video Type', line_shape= "spline", render_mode = "svg",
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    # color_discrete_sequence=px.colors.sequential.YlOrRd,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Power Consumption (mW)", "time": "Time (s)"}, 
-    category_orders={"Video Type": ["VLC-SW", "Chrome-SW", "Safari-HW", "Chrome-HW"]})
-
+        **chartLegend(spec.get('legend', 'below')))
+    return fig
+
+def renderRows(data, spec, group):
+    import plotly.express as px
+    metric = chartMetrics[spec['metric']]
+    fig = px.line(data[spec['metric']], x='time', y=spec['columns'], template='plotly_dark',
+        width = 700, height = spec['height'], facet_row='Video Type', line_shape= "spline", render_mode = "svg",
+        color_discrete_map=componentColors,
+        labels = {"value": metric['label'], "time": "Time (s)"},
+        category_orders = {"Video Type": spec.get('order', group['videoTypes'])})
+
+    # Move the row labels from the right hand side to the top right corner of each row
     fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']: 
-        # print(annotation)
+    for annotation in fig['layout']['annotations']:
         annotation['textangle'] = 0
         annotation['xanchor'] = 'right'
         annotation['x'] = annotation['x'] - 0.002
-        annotation['y'] = annotation['y'] + 0.038
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=13)
+        annotation['y'] = annotation['y'] + spec.get('facetLabelOffset', 0.038)
+        annotation['font'] = dict(family=chartFont, size=13)
 
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
+    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', ticksuffix = metric['tickSuffix'])
     fig.update_xaxes(showgrid=False, color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    # fig.update_traces(hovertemplate='%{y} (mW)', line_smoothing = 1.3)
-    fig.update_traces(hovertemplate='%{y} (mW)')
-    fig.update_layout(legend_title_text='', autosize = True, hovermode="x", 
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Power Consumption over Time</b> <br> <sup> Apple Mac Mini M1 | YouTube VP9 4K SDR | MacOS 11.2.2 </sup>",
-            'y':0.97,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
+    fig.update_yaxes(**spec.get('yaxes', {}))
+    fig.update_xaxes(**spec.get('xaxes', {}))
+    fig.update_traces(hovertemplate=metric['lineHover'])
+    fig.update_layout(autosize = True, hovermode="x", font = dict(family=chartFont),
+        title=chartTitle(spec, group, spec.get('titleY', 0.97)),
         margin = dict(r = 30, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'left', yanchor = 'top', 
-        x=0.85, y=0.75, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.04,
-            sizex=0.067, sizey=0.067,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-power-total-browser.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-total-browser.svg")
-
-     # BAR CHART FOR Averages by component
-    barDf = (dfPower.loc[dfPower["Video Type"].isin(["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, x='Video Type', y=['Efficiency Cluster', 'Performance Cluster', 'DRAM', 'GPU', 'Other'], template='plotly_dark', orientation='v', hover_name = 'Video Type',
-    width = 700, height = 400, barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn,
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Power Consumption (mW)"}, 
-    category_orders={"Video Type": ["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"]})
-
-    fig.update_yaxes(title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', range=[0, 1100])
+        **chartLegend('above'))
+    return fig
+
+def renderPlain(data, spec, group):
+    import plotly.express as px
+    return px.line(data[spec['metric']], x='time', y=spec['columns'],
+        width = 700, height = spec['height'], facet_row='Video Type', render_mode = "svg")
+
+def renderBars(averages, spec, group):
+    import plotly.express as px
+    metric = chartMetrics[spec['metric']]
+    fig = px.bar(averages[spec['metric']], x='Video Type', y=spec['columns'], template='plotly_dark', orientation='v', hover_name = 'Video Type',
+        width = 700, height = spec.get('height', 350), barmode = 'group',
+        color_discrete_map=spec.get('colors', componentColors),
+        labels={"value": metric['label']},
+        category_orders={"Video Type": spec.get('order', group['videoTypes'])})
+
+    fig.update_yaxes(title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', ticksuffix = metric['tickSuffix'])
+    if spec.get('yRange'):
+        fig.update_yaxes(range=spec['yRange'])
     fig.update_xaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{y:.0f} (mW)', texttemplate='%{y:.0f}', textfont= dict(size=8), width=[0.11, 0.11, 0.11, 0.11, 0.11])
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Power Consumption</b> <br> <sup> Apple Mac Mini M1 | YouTube VP9 4K SDR | MacOS 11.2.2 </sup>",
-            'y':0.93,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
+    fig.update_traces(hovertemplate=metric['barHover'], texttemplate=metric['barText'], textfont= dict(size=8), width=spec.get('barWidth', 0.15), textposition='outside')
+    fig.update_layout(autosize = True, hovermode=False, font = dict(family=chartFont),
+        title=chartTitle(spec, group, spec.get('titleY', 0.92)),
         margin = dict(r = 30, b = 0, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
+        **chartLegend('above'))
+    return fig
 
-    texts = [barDf['Efficiency Cluster'], barDf['Performance Cluster'], barDf['DRAM'], barDf['GPU'], barDf['Other']]
-    for i, t in enumerate(texts):
-        fig.data[i].text = t
-        fig.data[i].textposition = 'outside'
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=0.99, y=0.86, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.12,
-            sizex=0.145, sizey=0.145,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-power-average-browser.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-average-browser.svg")
-
-    # HORIZONTAL BAR CHART FOR Total Average
-    barDf = (dfPower.loc[dfPower["Video Type"].isin(["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, y='Video Type', x=['Package'], template='plotly_dark', orientation='h', hover_name = 'Video Type',  width = 700, height = 250, #barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn, 
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={"Package": "#57FFBC"},
-    # color_discrete_map={
-    #     "Efficiency Cluster": "#9D788C",
-    #     "Performance Cluster": "#2A9D8F",
-    #     "DRAM": "#E9C46A",
-    #     "GPU": "#F4A261",
-    #     # "Other": "rgb(95, 70, 144)"
-    #     "Other": "#E76F51"
-    # },
-    labels={"value": "Power Consumption (mW)"}, 
-    category_orders={"Video Type": ["Safari-HW", "Chrome-HW", "Chrome-SW", "VLC-SW"]})
+def renderPackageBar(averages, spec, group):
+    import plotly.express as px
+    fig = px.bar(averages['power'], y='Video Type', x=['Package'], template='plotly_dark', orientation='h', hover_name = 'Video Type',
+        width = 700, height = spec.get('height', 250),
+        color_discrete_map=packageColors,
+        labels={"value": chartMetrics['power']['label']},
+        category_orders={"Video Type": spec.get('order', group['videoTypes'])})
 
     fig.update_xaxes(zeroline = True, title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
     fig.update_yaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{x:.0f} (mW)', texttemplate='%{x:.0f} mW', textfont= dict(size=11))
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        showlegend = False, font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Power Consumption</b> <br> <sup> Apple Mac Mini M1 | YouTube VP9 4K SDR | MacOS 11.2.2 </sup>",
-            'y':0.90,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
+    fig.update_traces(hovertemplate='%{x:.0f} (mW)', texttemplate='%{x:.0f} mW', textfont= dict(size=11), textposition='inside')
+    fig.update_layout(autosize = True, hovermode=False, legend_title_text='', font = dict(family=chartFont),
+        title=chartTitle(spec, group, spec.get('titleY', 0.90)),
         margin = dict(r = 30, b = 15, t = 60),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    texts = [barDf['Package']]
-    for i, t in enumerate(texts):
-        print('i = ', i,'t= ' ,t)
-        fig.data[i].text = t
-        fig.data[i].textposition = 'inside'
+        **chartLegend(None))
+    return fig
+
+# Figure kind -> (renderer, whether it draws the per sample data or the averages)
+chartRenderers = {
+    'timeline': (renderTimeline, 'samples'),
+    'rows': (renderRows, 'samples'),
+    'plain': (renderPlain, 'samples'),
+    'bars': (renderBars, 'averages'),
+    'packageBar': (renderPackageBar, 'averages'),
+}
+
+def styleChart(fig, spec, kLogo):
+    # Branding and colours common to every published chart
+    x, y = spec['watermark']
+    logoX, logoY, logoSize = spec.get('logo', (-0.12, 1.15, 0.18) if spec['kind'] == 'bars' else (-0.125, 1.19, 0.22))
+    background = spec.get('background', chartBackground)
+
+    fig.update_layout(margin_pad = 10, modebar = dict(orientation = 'v'), plot_bgcolor=background, paper_bgcolor=background)
 
     fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=0.99, y=1, showarrow=False,  font=dict(size=14, color='#707070'))
+        xref="paper", yref="paper", xanchor = 'left' if spec['kind'] == 'rows' else 'right', yanchor = 'top',
+        x=x, y=y, showarrow=False,  font=dict(size=14, color='#707070'))
 
     fig.add_layout_image(
         dict(
             source=kLogo,
             xref="paper", yref="paper",
-            x=-0.18, y=1.099,
-            sizex=0.29, sizey=0.29,
+            x=logoX, y=logoY,
+            sizex=logoSize, sizey=logoSize,
             xanchor="left", yanchor="bottom"
         )
     )
 
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-power-average-total-browser.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-average-total-browser.svg")
-
-
-    # Figure for CPU, GPU Frequency over time
-    fig = px.line(dfFrequency.loc[dfFrequency["Video Type"].isin(["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"])], x='time', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', 
-    width = 700, height = 350, facet_col='Video Type', line_shape= "spline", render_mode = "svg",  facet_col_wrap = 5,
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Frequency (MHz)", "time": "Time (s)"},
-    category_orders={"Video Type": ["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"]})
-    
-    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']:
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=11)
-    
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
-    fig.update_xaxes(showgrid=False, title_font = dict(size=10), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    fig.update_traces(hovertemplate='%{y} MHz', line_smoothing = 1.3)
-    fig.update_layout(legend_title_text='', autosize = True, hovermode="x", 
-        legend=dict(orientation="h", yanchor="top", y=-0.3, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Frequency over Time</b> <br> <sup> Apple Mac Mini M1 | YouTube VP9 4K SDR | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 50, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1.05, y=1.3, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.125, y=1.19,
-            sizex=0.22, sizey=0.22,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    fig.write_html("outputs/plotly-frequency-browser.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-frequency-browser.svg")
-
-   # Average Frequency
-    barDf = (dfFrequency.loc[dfFrequency["Video Type"].isin(["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, x='Video Type', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', orientation='v', hover_name = 'Video Type',
-    width = 700, height = 350, barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn,
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Frequency (MHz)"}, 
-    category_orders={"Video Type": ["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"]})
-
-    fig.update_yaxes(title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', range=[0, 1650])
-    fig.update_xaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{y:.0f} (Hz)', texttemplate='%{y:.0f}', textfont= dict(size=8), width=[0.15, 0.15, 0.15, 0.15, 0.15])
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Frequency</b> <br> <sup> Apple Mac Mini M1 | YouTube VP9 4K SDR | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, b = 0, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    texts = [barDf['Efficiency Cluster'], barDf['Performance Cluster'], barDf['GPU']]
-    for i, t in enumerate(texts):
-        fig.data[i].text = t
-        fig.data[i].textposition = 'outside'
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=0.99, y=1.25, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.15,
-            sizex=0.18, sizey=0.18,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-frequency-average-browser.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-frequency-average-browser.svg")
-
-    # Figure for CPU, GPU Usage over time
-    fig = px.line(dfUsage.loc[dfUsage["Video Type"].isin(["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"])], x='time', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', 
-    width = 700, height = 350, facet_col='Video Type', line_shape= "spline", render_mode = "svg",  facet_col_wrap = 5,
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    # color_discrete_sequence= px.colors.sequential.Burgyl,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Usage (%)", "time": "Time (s)"},
-    category_orders={"Video Type": ["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"]})
-    
-    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']:
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=11)
-    
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', ticksuffix = "%")
-    fig.update_xaxes(showgrid=False, title_font = dict(size=10), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    fig.update_traces(hovertemplate='%{y:.0f} %', line_smoothing = 1.3)
-    fig.update_layout(legend_title_text='', autosize = True, hovermode="x", 
-        legend=dict(orientation="h", yanchor="top", y=-0.3, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Usage over Time</b> <br> <sup> Apple Mac Mini M1 | YouTube VP9 4K SDR | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 50, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1.05, y=1.3, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.125, y=1.19,
-            sizex=0.22, sizey=0.22,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    fig.write_html("outputs/plotly-usage-browser.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-usage-browser.svg")
-
- # BAR CHART FOR Averages by component
-    barDf = (dfUsage.loc[dfUsage["Video Type"].isin(["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, x='Video Type', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', orientation='v', hover_name = 'Video Type',
-    width = 700, height = 350, barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn,
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Usage (%)"}, 
-    category_orders={"Video Type": ["VLC-SW", "Safari-HW", "Chrome-HW", "Chrome-SW"]})
-
-    fig.update_yaxes(title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', range=[0, 32], ticksuffix = "%")
-    fig.update_xaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{y:.0f} (%)', texttemplate='%{y:.0f} %', textfont= dict(size=8), width=[0.15, 0.15, 0.15, 0.15, 0.15])
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Usage</b> <br> <sup> Apple Mac Mini M1 | YouTube VP9 4K SDR | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, b = 0, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    texts = [barDf['Efficiency Cluster'], barDf['Performance Cluster'], barDf['GPU']]
-    for i, t in enumerate(texts):
-        fig.data[i].text = t
-        fig.data[i].textposition = 'outside'
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1, y=1.25, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.15,
-            sizex=0.18, sizey=0.18,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-usage-average-browser.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-usage-average-browser.svg")
-
-def buildNetflixCharts(dfPower, dfFrequency, dfUsage, config, kLogo):
-    dfPower["Video Type"].replace({"Safari-Netflix-1080p":"Safari (H.265 1080p)", "Chrome-Netflix-720p":"Chrome (VP9 720p)"}, inplace=True)
-    dfFrequency["Video Type"].replace({"Safari-Netflix-1080p":"Safari (H.265 1080p)", "Chrome-Netflix-720p":"Chrome (VP9 720p)"}, inplace=True)
-    dfUsage["Video Type"].replace({"Safari-Netflix-1080p":"Safari (H.265 1080p)", "Chrome-Netflix-720p":"Chrome (VP9 720p)"}, inplace=True)
-    
-    # Figure for Package Power Over Time
-    fig = px.line(dfPower.loc[dfPower["Video Type"].isin(["Safari (H.265 1080p)", "Chrome (VP9 720p)"])], x='time', y=['Package'], template='plotly_dark', 
-    width = 700, height = 350, 
-    color='Video Type', line_shape= "spline", render_mode = "svg", 
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    color_discrete_map={
-        "Safari (H.265 1080p)": "#19C0FC",
-        "Chrome (VP9 720p)": "#FAD108"
-    },
-    labels={"value": "Power Consumption (mW)", "time": "Time (s)"})
-    
-    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']:
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=11)
-    
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
-    fig.update_xaxes(showgrid=False, title_font = dict(size=10), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    fig.update_traces(hovertemplate='%{y} (mW)', line_smoothing = 1.3)
-    fig.update_layout(autosize = True, hovermode="x", legend_title_text='',
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Total Package Power Consumption over Time</b> <br> <sup> Apple Mac Mini M1 | Netflix Queen's Gambit | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 50, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1.05, y=1.1, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.125, y=1.18,
-            sizex=0.21, sizey=0.21,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    fig.write_html("outputs/plotly-power-package-netflix.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-package-netflix.svg")
-
-    # Figure for Total Power Over Time
-    fig = px.line(dfPower.loc[dfPower["Video Type"].isin(['Safari (H.265 1080p)', "Chrome (VP9 720p)"])], x='time', y=['Efficiency Cluster', 'Performance Cluster', 'DRAM', 'GPU', 'Other'], template='plotly_dark', 
-    width = 700, height = 500, facet_row='Video Type', line_shape= "spline", render_mode = "svg",
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    # color_discrete_sequence=px.colors.sequential.YlOrRd,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Power Consumption (mW)", "time": "Time (s)"}, 
-    category_orders={"Video Type": ['Safari (H.265 1080p)', "Chrome (VP9 720p)"]})
-
-    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']: 
-        # print(annotation)
-        annotation['textangle'] = 0
-        annotation['xanchor'] = 'right'
-        annotation['x'] = annotation['x'] - 0.002
-        annotation['y'] = annotation['y'] + 0.088
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=13)
-
-    fig.update_yaxes(type='linear', title_font = dict(size=10), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
-    fig.update_xaxes(showgrid=False, title_font = dict(size=11), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    # fig.update_traces(hovertemplate='%{y} (mW)', line_smoothing = 1.3)
-    fig.update_traces(hovertemplate='%{y} (mW)')
-    fig.update_layout(legend_title_text='', autosize = True, hovermode="x", 
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Power Consumption over Time</b> <br> <sup> Apple Mac Mini M1 | Netflix Queen's Gambit | MacOS 11.2.2 </sup>",
-            'y':0.94,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'left', yanchor = 'top', 
-        x=0.8, y=-0.1, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.09,
-            sizex=0.12, sizey=0.12,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-power-total-netflix.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-total-netflix.svg")
-
-   # BAR CHART FOR Averages by component
-    barDf = (dfPower.loc[dfPower["Video Type"].isin(["Safari (H.265 1080p)", "Chrome (VP9 720p)"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, x='Video Type', y=['Efficiency Cluster', 'Performance Cluster', 'DRAM', 'GPU', 'Other'], template='plotly_dark', orientation='v', hover_name = 'Video Type',
-    width = 700, height = 400, barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn,
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Power Consumption (mW)"}, 
-    category_orders={"Video Type": ["Safari (H.265 1080p)", "Chrome (VP9 720p)"]})
-
-    fig.update_yaxes(title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', range=[0, 65])
-    fig.update_xaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{y:.0f} (mW)', texttemplate='%{y:.0f}', textfont= dict(size=8), width=[0.11, 0.11, 0.11, 0.11, 0.11])
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Power Consumption</b> <br> <sup> Apple Mac Mini M1 | Netflix Queen's Gambit | MacOS 11.2.2 </sup>",
-            'y':0.93,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, b = 0, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    texts = [barDf['Efficiency Cluster'], barDf['Performance Cluster'], barDf['DRAM'], barDf['GPU'], barDf['Other']]
-    for i, t in enumerate(texts):
-        fig.data[i].text = t
-        fig.data[i].textposition = 'outside'
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=0.99, y=0.9, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.12,
-            sizex=0.145, sizey=0.145,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-power-average-netflix.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-average-netflix.svg")
-
-    # HORIZONTAL BAR CHART FOR Total Average
-    barDf = (dfPower.loc[dfPower["Video Type"].isin(["Safari (H.265 1080p)", "Chrome (VP9 720p)"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, y='Video Type', x=['Package'], template='plotly_dark', orientation='h', hover_name = 'Video Type',  width = 700, height = 200, #barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn, 
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={"Package": "#57FFBC"},
-    # color_discrete_map={
-    #     "Efficiency Cluster": "#9D788C",
-    #     "Performance Cluster": "#2A9D8F",
-    #     "DRAM": "#E9C46A",
-    #     "GPU": "#F4A261",
-    #     # "Other": "rgb(95, 70, 144)"
-    #     "Other": "#E76F51"
-    # },
-    labels={"value": "Power Consumption (mW)"}, 
-    category_orders={"Video Type": ["Safari-HW", "Chrome-HW", "Chrome-SW", "VLC-SW"]})
-
-    fig.update_xaxes(zeroline = True, title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
-    fig.update_yaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{x:.0f} (mW)', texttemplate='%{x:.0f} mW', textfont= dict(size=11))
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        showlegend = False, font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Power Consumption</b> <br> <sup> Apple Mac Mini M1 | Netflix Queen's Gambit | MacOS 11.2.2 </sup>",
-            'y':0.87,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, b = 15, t = 60),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    texts = [barDf['Package']]
-    for i, t in enumerate(texts):
-        print('i = ', i,'t= ' ,t)
-        fig.data[i].text = t
-        fig.data[i].textposition = 'inside'
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1.02, y=1.5, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.27, y=1.16,
-            sizex=0.49, sizey=0.49,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-power-average-total-netflix.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-power-average-total-netflix.svg")
-
-
-    # Figure for CPU, GPU Frequency over time
-    fig = px.line(dfFrequency.loc[dfFrequency["Video Type"].isin(["Safari (H.265 1080p)", "Chrome (VP9 720p)"])], x='time', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', 
-    width = 700, height = 350, facet_col='Video Type', line_shape= "spline", render_mode = "svg",  facet_col_wrap = 5,
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Frequency (MHz)", "time": "Time (s)"},
-    category_orders={"Video Type": ["Safari (H.265 1080p)", "Chrome (VP9 720p)"]})
-    
-    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']:
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=11)
-    
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424')
-    fig.update_xaxes(showgrid=False, title_font = dict(size=10), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    fig.update_traces(hovertemplate='%{y} MHz', line_smoothing = 1.3)
-    fig.update_layout(legend_title_text='', autosize = True, hovermode="x", 
-        legend=dict(orientation="h", yanchor="top", y=-0.3, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Frequency over Time</b> <br> <sup> Apple Mac Mini M1 | Netflix Queen's Gambit | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 50, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1.05, y=1.3, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.125, y=1.19,
-            sizex=0.22, sizey=0.22,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    fig.write_html("outputs/plotly-frequency-netflix.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-frequency-netflix.svg")
-
-   # Average Frequency
-    barDf = (dfFrequency.loc[dfFrequency["Video Type"].isin(["Safari (H.265 1080p)", "Chrome (VP9 720p)"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, x='Video Type', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', orientation='v', hover_name = 'Video Type',
-    width = 700, height = 350, barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn,
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Frequency (MHz)"}, 
-    category_orders={"Video Type": ["Safari (H.265 1080p)", "Chrome (VP9 720p)"]})
-
-    fig.update_yaxes(title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', range=[0, 1250])
-    fig.update_xaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{y:.0f} (Hz)', texttemplate='%{y:.0f}', textfont= dict(size=8), width=[0.15, 0.15, 0.15, 0.15, 0.15])
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Frequency</b> <br> <sup> Apple Mac Mini M1 | Netflix Queen's Gambit | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, b = 0, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    texts = [barDf['Efficiency Cluster'], barDf['Performance Cluster'], barDf['GPU']]
-    for i, t in enumerate(texts):
-        fig.data[i].text = t
-        fig.data[i].textposition = 'outside'
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=0.99, y=1.25, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.15,
-            sizex=0.18, sizey=0.18,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-frequency-average-netflix.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-frequency-average-netflix.svg")
-
-    # Figure for CPU, GPU Usage over time
-    fig = px.line(dfUsage.loc[dfUsage["Video Type"].isin(["Safari (H.265 1080p)", "Chrome (VP9 720p)"])], x='time', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', 
-    width = 700, height = 350, facet_col='Video Type', line_shape= "spline", render_mode = "svg",  facet_col_wrap = 5,
-    # color_discrete_sequence = px.colors.qualitative.G10,
-    # color_discrete_sequence= px.colors.sequential.Burgyl,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Usage (%)", "time": "Time (s)"},
-    category_orders={"Video Type": ["Safari (H.265 1080p)", "Chrome (VP9 720p)"]})
-    
-    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
-    for annotation in fig['layout']['annotations']:
-        annotation['font'] = dict(family="SF Pro Display, Roboto, Droid Sans, Arial", size=11)
-    
-    fig.update_yaxes(type='linear', title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', ticksuffix = "%")
-    fig.update_xaxes(showgrid=False, title_font = dict(size=10), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9))
-    fig.update_traces(hovertemplate='%{y:.0f} %', line_smoothing = 1.3)
-    fig.update_layout(legend_title_text='', autosize = True, hovermode="x", 
-        legend=dict(orientation="h", yanchor="top", y=-0.3, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Usage over Time</b> <br> <sup> Apple Mac Mini M1 | Netflix Queen's Gambit | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 50, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1.05, y=1.3, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.125, y=1.19,
-            sizex=0.22, sizey=0.22,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    fig.write_html("outputs/plotly-usage-netflix.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-usage-netflix.svg")
-
- # BAR CHART FOR Averages by component
-    barDf = (dfUsage.loc[dfUsage["Video Type"].isin(["Safari (H.265 1080p)", "Chrome (VP9 720p)"])]).groupby(['Video Type']).mean().reset_index()
-    fig = px.bar(barDf, x='Video Type', y=['Efficiency Cluster', 'Performance Cluster', 'GPU'], template='plotly_dark', orientation='v', hover_name = 'Video Type',
-    width = 700, height = 350, barmode = 'group', 
-    # color_discrete_sequence=px.colors.sequential.Blugrn,
-    # color_discrete_sequence=px.colors.qualitative.Set1,
-    color_discrete_map={
-        "Efficiency Cluster": "#73A4FF",
-        "Performance Cluster": "#FF715A",
-        "DRAM": "#C590FF",
-        "GPU": "#01F0B0",
-        "Other": "#FEAF73"
-    },
-    labels={"value": "Usage (%)"}, 
-    category_orders={"Video Type": ["Safari (H.265 1080p)", "Chrome (VP9 720p)"]})
-
-    fig.update_yaxes(title_font = dict(size=12), color="#707070", title_font_color = "#707070", tickfont = dict(size = 9), gridcolor='#242424', zerolinecolor = '#242424', range=[0, 20], ticksuffix = "%")
-    fig.update_xaxes(zeroline = True, showgrid=False, color="#FFF", title_font_color = "#707070", tickfont = dict(size = 11), title_text='')
-    fig.update_traces(hovertemplate='%{y:.0f} (%)', texttemplate='%{y:.0f} %', textfont= dict(size=8), width=[0.15, 0.15, 0.15, 0.15, 0.15])
-    fig.update_layout( autosize = True, hovermode=False, legend_title_text='',
-        legend=dict(orientation="h", yanchor="bottom", y=1, xanchor="center", x=0.5), 
-        font = dict(family="SF Pro Display, Roboto, Droid Sans, Arial"),
-        title={
-            'text': "<b>Average Usage</b> <br> <sup> Apple Mac Mini M1 | Netflix Queen's Gambit | MacOS 11.2.2 </sup>",
-            'y':0.92,
-            'x':0.54,
-            'xanchor': 'center',
-            'yanchor': 'top',
-            'font': dict(size=18, color='#FFF')},
-        margin = dict(r = 30, b = 0, t = 80),
-        margin_pad = 10,
-        modebar = dict(orientation = 'v'),
-        plot_bgcolor='#191C1F',
-        paper_bgcolor ='#191C1F'
-    )
-
-    texts = [barDf['Efficiency Cluster'], barDf['Performance Cluster'], barDf['GPU']]
-    for i, t in enumerate(texts):
-        fig.data[i].text = t
-        fig.data[i].textposition = 'outside'
-
-    fig.add_annotation(text="//singhkays.com",
-        xref="paper", yref="paper", xanchor = 'right', yanchor = 'top', 
-        x=1, y=1.25, showarrow=False,  font=dict(size=14, color='#707070'))
-
-    fig.add_layout_image(
-        dict(
-            source=kLogo,
-            xref="paper", yref="paper",
-            x=-0.12, y=1.15,
-            sizex=0.18, sizey=0.18,
-            xanchor="left", yanchor="bottom"
-        )
-    )
-
-    #fig.write_image("plotly-power.svg")
-    fig.write_html("outputs/plotly-usage-average-netflix.html", include_plotlyjs="cdn", config = config)
-    fig.write_image("outputs/plotly-usage-average-netflix.svg")
-
-def outputExcel(dfPower, dfFrequency, dfUsage):
-    # create excel writer object
-    writer = pd.ExcelWriter('outputs/output.xlsx')
-
-    # Write a different sheet for each dataframe
-    dfPower.to_excel(writer, sheet_name = 'power', freeze_panes=(1,1), index = False) 
-    dfFrequency.to_excel(writer, sheet_name = 'frequency', freeze_panes=(1,1), index = False) 
-    dfUsage.to_excel(writer, sheet_name = 'usage', freeze_panes=(1,1), index = False) 
-
-    print("Exporting Excel file...")
-    writer.save()
+def selectVideoTypes(df, group):
+    # Rows of the group's video types with the display names used in its charts. Works on a copy so
+    # the renames of one group never leak into the next one
+    displayNames = group['rename']
+    sourceNames = {displayNames.get(videoType, videoType) : videoType for videoType in df['Video Type'].unique()}
+    sourceTypes = [source for display, source in sourceNames.items() if display in group['videoTypes']]
+    subset = df.loc[df['Video Type'].isin(sourceTypes)].copy()
+    subset['Video Type'] = subset['Video Type'].replace(displayNames)
+    return subset
+
+def loadChartManifest(path):
+    # Manifest of the charts in outputs/, a missing or unreadable one just rebuilds everything
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def storeJson(path, data):
+    # Written next to the file and renamed over it, so a crash never leaves a half written file behind
+    temporaryPath = path + '.tmp'
+    with open(temporaryPath, 'w') as f:
+        json.dump(data, f, indent=1, sort_keys=True)
+    os.replace(temporaryPath, path)
+
+def chartFingerprint(spec, group, config, dataDigest, downsample=None, htmlMode='cdn'):
+    # Anything a figure is drawn from: its spec, the group it belongs to, the Plotly config, the downsampling,
+    # the html output mode and its data
+    digest = hashlib.sha1()
+    groupSettings = {key: value for key, value in group.items() if key != 'figures'}
+    digest.update(json.dumps([spec, groupSettings, config, downsample, htmlMode], sort_keys=True, default=str).encode())
+    digest.update(dataDigest)
+    return digest.hexdigest()
+
+def chartOutputs(spec, htmlMode='cdn'):
+    paths = ["outputs/" + spec['output'] + ".html"]
+    if spec['kind'] != 'plain':
+        paths.append("outputs/" + spec['output'] + ".svg")
+    if htmlMode == 'dashboard':
+        paths.append("outputs/figures/" + spec['output'] + ".js")
+    return paths
+
+# Local copy of plotly.js shared by every html output in dashboard mode, for machines that can't reach the CDN
+plotlyBundleName = "plotly.min.js"
+
+def writePlotlyBundle(folder):
+    # Written once, and again only when the installed Plotly ships a different bundle
+    import plotly.offline
+    bundle = plotly.offline.get_plotlyjs()
+    path = os.path.join(folder, plotlyBundleName)
+    if os.path.exists(path) and os.path.getsize(path) == len(bundle.encode()):
+        with open(path) as f:
+            if f.read() == bundle:
+                return
+    with open(path, 'w') as f:
+        f.write(bundle)
+
+def writeChartHtml(fig, spec, config, htmlMode):
+    # cdn: standalone pages loading plotly.js from the CDN (the default)
+    # dashboard: pages loading the local bundle, plus the figure as a script the dashboard index loads on demand.
+    # A script rather than a .json file so the dashboard also works when opened straight from disk (file://)
+    path = "outputs/" + spec['output'] + ".html"
+    # write_html adds its own keys to the config, copy it so the shared config (and the chart fingerprints) stay as given
+    config = dict(config) if config else config
+    if htmlMode != 'dashboard':
+        fig.write_html(path, include_plotlyjs="cdn", config = config)
+        return
+
+    fig.write_html(path, include_plotlyjs=plotlyBundleName, config = config)
+    os.makedirs("outputs/figures", exist_ok=True)
+    with open("outputs/figures/" + spec['output'] + ".js", 'w') as f:
+        f.write(f"registerChart({json.dumps(spec['output'])}, {fig.to_json()}, {json.dumps(config or {})});\n")
+
+dashboardTemplate = Template("""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>powermetrics charts</title>
+<script src="$bundle"></script>
+<style>
+body { background: #191C1F; color: #FFF; font-family: SF Pro Display, Roboto, Droid Sans, Arial; margin: 0 auto; width: 740px; }
+h2 { color: #707070; font-size: 16px; font-weight: normal; margin: 40px 0 10px; }
+.chart { margin: 20px 0; }
+.chart a { color: #707070; font-size: 11px; }
+</style>
+</head>
+<body>
+$groups
+<script>
+// Each figure is only fetched and drawn once it is about to scroll into view
+function registerChart(name, figure, config) {
+    Plotly.newPlot(document.getElementById(name), figure.data, figure.layout, config);
+}
+const observer = new IntersectionObserver(function (entries) {
+    for (const entry of entries) {
+        if (!entry.isIntersecting) continue;
+        observer.unobserve(entry.target);
+        const script = document.createElement("script");
+        script.src = "figures/" + entry.target.id + ".js";
+        document.body.appendChild(script);
+    }
+}, {rootMargin: "300px"});
+document.querySelectorAll(".chart > div").forEach(function (chart) { observer.observe(chart); });
+</script>
+</body>
+</html>
+""")
+
+def writeDashboard(groups, path="outputs/index.html"):
+    # Index of every chart, a placeholder of the figure's size per chart until its figure is loaded
+    sections = []
+    for group in groups:
+        sections.append(f"<h2>{html.escape(group['subtitle'])}</h2>")
+        for spec in group['figures']:
+            sections.append(f'<div class="chart"><div id="{html.escape(spec["output"])}" style="height: {spec.get("height", 350)}px"></div>'
+                f'<a href="{html.escape(spec["output"])}.html">{html.escape(spec.get("title", spec["output"]))}</a></div>')
+
+    with open(path, 'w') as f:
+        f.write(dashboardTemplate.substitute(bundle=plotlyBundleName, groups="\n".join(sections)))
+
+def buildChartGroup(group, frames, config, kLogo, manifest=None, newManifest=None, downsample=None, htmlMode='cdn'):
+    # Filter (and rename) each dataframe once per group and average (or downsample) it at most once, every figure reuses them
+    data = {metric: selectVideoTypes(df, group) for metric, df in frames.items()}
+    averages = {}
+    sampled = {}
+    dataDigests = {}
+    imageJobs = []
+    rebuilt = 0
+
+    for spec in group['figures']:
+        metric = spec.get('metric', 'power')
+
+        # Skip figures whose inputs are the same as the last time they were built
+        if newManifest is not None:
+            if metric not in dataDigests:
+                dataDigests[metric] = hashlib.sha1(pd.util.hash_pandas_object(data[metric], index=False).values.tobytes()).digest()
+            entry = {
+                'videoTypes': sorted(data[metric]['Video Type'].unique().tolist()),
+                'parserVersion': parserVersion,
+                'fingerprint': chartFingerprint(spec, group, config, dataDigests[metric],
+                    downsample if chartRenderers[spec['kind']][1] == 'samples' else None, htmlMode)}
+            newManifest[spec['output']] = entry
+            if (manifest or {}).get(spec['output']) == entry and all(os.path.exists(path) for path in chartOutputs(spec, htmlMode)):
+                continue
+
+        rebuilt += 1
+        with traceStage('figure', output=spec['output']):
+            render, source = chartRenderers[spec['kind']]
+            if source == 'averages':
+                if metric not in averages:
+                    averages[metric] = averageByVideoType(data[metric])
+                fig = render(averages, spec, group)
+            elif downsample:
+                # Over time figures draw at most the configured number of points per trace, averages use every sample
+                key = (metric, tuple(spec['columns']))
+                if key not in sampled:
+                    sampled[key] = downsampleSamples(data[metric], spec['columns'], downsample['points'], downsample['method'])
+                fig = render({metric: sampled[key]}, spec, group)
+            else:
+                fig = render(data, spec, group)
+            if spec['kind'] != 'plain':
+                styleChart(fig, spec, kLogo)
+
+        if spec['kind'] == 'plain':
+            with traceStage('write_html', output=spec['output']):
+                writeChartHtml(fig, spec, None, htmlMode)
+            continue
+
+        with traceStage('write_html', output=spec['output']):
+            writeChartHtml(fig, spec, config, htmlMode)
+        imageJobs.append(("outputs/" + spec['output'] + ".svg", fig.to_json()))
+
+    return imageJobs, rebuilt
+
+def startImageRenderer():
+    # Kaleido 1.x launches a browser for every write_image unless a server is kept running in the process,
+    # older Kaleido keeps its renderer subprocess alive on its own
+    try:
+        import kaleido
+    except ImportError:
+        return
+    if hasattr(kaleido, 'start_sync_server'):
+        kaleido.start_sync_server(silence_warnings=True)
+
+def exportImageTask(job):
+    # One static image per task. Runs in a renderer process which is reused for the following jobs
+    import plotly.io as pio
+    path, figureJson = job
+    with traceStage('write_image', output=os.path.basename(path)) as stage:
+        pio.write_image(pio.from_json(figureJson), path)
+    return path, stage['wall']
+
+def exportImages(imageJobs, workers):
+    # Static export dominates the chart stage, so every figure is rendered concurrently by a pool of renderer processes
+    if not imageJobs:
+        return []
+
+    start = time.perf_counter()
+    if workers > 1 and len(imageJobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(imageJobs)), initializer=startImageRenderer) as pool:
+            timings = tracedMap(pool, exportImageTask, imageJobs)
+    else:
+        startImageRenderer()
+        timings = [exportImageTask(job) for job in imageJobs]
+    wallTime = time.perf_counter() - start
+
+    print(f"Exported {len(timings)} images in {wallTime:.2f} s ({sum(seconds for path, seconds in timings):.2f} s of rendering)")
+    for path, seconds in sorted(timings, key=lambda timing: timing[1], reverse=True):
+        print(f"{seconds:8.2f} s  {os.path.basename(path)}")
+    return timings
+
+def buildCharts(dfPower, dfFrequency, dfUsage, config, kLogo, groups=chartGroups, workers=1, manifestPath=None, downsample=None, htmlMode='cdn'):
+    # Figures and their html are built here, the static images are exported together at the end.
+    # With a manifest only the figures whose spec or data changed since the last run are rebuilt
+    frames = {'power': dfPower, 'frequency': dfFrequency, 'usage': dfUsage}
+    manifest = loadChartManifest(manifestPath) if manifestPath else None
+    newManifest = {} if manifestPath else None
+
+    if htmlMode == 'dashboard':
+        writePlotlyBundle("outputs")
+        writeDashboard(groups)
+
+    imageJobs = []
+    rebuilt = 0
+    for group in groups:
+        with traceStage('chart group', group=group['subtitle'].split(' | ')[1]):
+            groupJobs, groupRebuilt = buildChartGroup(group, frames, config, kLogo, manifest, newManifest, downsample, htmlMode)
+        imageJobs += groupJobs
+        rebuilt += groupRebuilt
+    with traceStage('images', count=len(imageJobs)):
+        exportImages(imageJobs, workers)
+
+    if manifestPath:
+        print(f"Rebuilt {rebuilt} of {len(newManifest)} charts, {len(newManifest) - rebuilt} unchanged")
+        storeJson(manifestPath, newManifest)
+
+def exportTables(dfSamples, dfSampleTimes, dfPower, dfFrequency, dfUsage, dfSummary, dfWorkload, dfPhases, dfCores, dfTimeInState, dfWeighted):
+    # Every table we export, by name. Each one has a Video Type (or run) column to partition on
+    return {
+        'phases': dfPhases,
+        'workload energy': dfWorkload,
+        'samples': dfSamples,
+        'sample times': dfSampleTimes,
+        'power': dfPower,
+        'frequency': dfFrequency,
+        'usage': dfUsage,
+        'energy': energyByVideoType(dfPower),
+        'summary': dfSummary,
+        'summary averages': summaryAverages(dfSummary),
+        'cores': dfCores,
+        'time in state': dfTimeInState,
+        'weighted frequency': dfWeighted,
+    }
+
+def partitionsByVideoType(df):
+    # (partition column, video type, rows) of every video type in the table
+    column = 'Video Type' if 'Video Type' in df else 'run'
+    for videoType, partition in df.groupby(column, sort=True, observed=True):
+        yield column, str(videoType), partition.reset_index(drop=True)
+
+def resetExportFolder(folder):
+    # Partitions of video types that are gone must not survive from a previous export
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+
+def exportParquet(tables, folder):
+    # Hive style partitions, pd.read_parquet("outputs/parquet/power") reads them back with the Video Type column
+    for name, df in tables.items():
+        resetExportFolder(os.path.join(folder, 'parquet', name))
+        for column, videoType, partition in partitionsByVideoType(df):
+            partitionFolder = os.path.join(folder, 'parquet', name, column + '=' + videoType)
+            os.makedirs(partitionFolder)
+            partition.drop(columns=column).to_parquet(os.path.join(partitionFolder, 'part-0.parquet'), index=False)
+
+def exportFeather(tables, folder):
+    # Uncompressed Arrow IPC files, one per table and video type, so notebooks can memory map them
+    # (pyarrow.ipc.open_file(pyarrow.memory_map(path)))
+    for name, df in tables.items():
+        resetExportFolder(os.path.join(folder, 'feather', name))
+        for column, videoType, partition in partitionsByVideoType(df):
+            partition.to_feather(os.path.join(folder, 'feather', name, videoType + '.feather'), compression='uncompressed')
+
+def exportCsv(tables, folder):
+    # One file per table, written a chunk of rows at a time instead of formatting the whole table in memory
+    os.makedirs(os.path.join(folder, 'csv'), exist_ok=True)
+    for name, df in tables.items():
+        df.to_csv(os.path.join(folder, 'csv', name + '.csv'), index=False, chunksize=100000)
+
+def exportExcel(tables, folder):
+    # Kept for spreadsheets, slow and limited to about 1M rows per sheet
+    with pd.ExcelWriter(os.path.join(folder, 'output.xlsx')) as writer:
+        for name, df in tables.items():
+            df.to_excel(writer, sheet_name = 'energy (mJ)' if name == 'energy' else name, freeze_panes=(1,1), index = False)
+
+exporters = {
+    'parquet': exportParquet,
+    'feather': exportFeather,
+    'csv': exportCsv,
+    'excel': exportExcel,
+}
+
+def exportResults(tables, formats, folder="outputs"):
+    # Parquet, Feather and Excel need optional packages (pyarrow, openpyxl), fall back to csv when one is missing
+    for exportFormat in formats:
+        print(f"Exporting {exportFormat}...")
+        try:
+            with traceStage('export', format=exportFormat):
+                exporters[exportFormat](tables, folder)
+        except ImportError as error:
+            print(f"Can't export {exportFormat}: {error}")
+            if 'csv' not in formats:
+                print("Exporting csv instead...")
+                with traceStage('export', format='csv'):
+                    exportCsv(tables, folder)
+                formats = list(formats) + ['csv']
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Parse powermetrics logs and build the charts")
+    parser.add_argument('command', nargs='?', choices=['all', 'parse', 'summarize', 'render', 'export', 'query'], default='all',
+        help="parse: parse the logs into the cache. summarize: print the averages, phases, workload energy and active frequencies of every run. "
+            "render: build the charts. export: export the parsed tables. all: render and export. "
+            "query: run an SQL query on the samples and runs parsed by the other commands, without parsing (default: all)")
+    parser.add_argument('sql', nargs='?', help="SQL query of the query command, e.g. \"SELECT run, AVG(Package) FROM power GROUP BY run\"")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+        help="Number of processes used to parse the logs, 1 parses them sequentially (default: number of CPUs)")
+    parser.add_argument('--render-workers', type=int,
+        help="Number of renderer processes used to export the chart images, 1 exports them sequentially (default: same as --workers)")
+    parser.add_argument('--rebuild-charts', action='store_true', help="Rebuild every chart, even the ones whose inputs did not change")
+    parser.add_argument('--points-per-trace', type=int, default=0,
+        help="Downsample the over time charts to about this many points per trace and video type, 0 draws every sample (default: 0)")
+    parser.add_argument('--downsample', choices=sorted(downsamplers), default='lttb',
+        help="Downsampling method used with --points-per-trace (default: lttb)")
+    parser.add_argument('--html', choices=['cdn', 'dashboard'], default='cdn',
+        help="cdn: standalone pages loading plotly.js from the CDN. dashboard: a local plotly.js shared by every page "
+            "and an outputs/index.html loading each chart when it scrolls into view (default: cdn)")
+    parser.add_argument('--export', nargs='+', choices=sorted(exporters), default=['feather'],
+        help="Formats the parsed tables are exported in, Parquet and Feather are partitioned by video type (default: feather)")
+    parser.add_argument('--idle-padding', type=float,
+        help="Seconds of idle capture before and after every workload, instead of detecting the workload window from the power")
+    parser.add_argument('--workload-window', action='append', metavar='VIDEO_TYPE=START:END',
+        help="Workload window of one run in seconds since the start of its capture, can be repeated")
+    parser.add_argument('--phase-penalty', type=float, default=10,
+        help="Change point penalty of the phase segmentation, higher finds fewer phases (default: 10)")
+    parser.add_argument('--phase-residency', action='store_true', help="Also split phases on changes in the cluster residencies")
+    parser.add_argument('--list-runs', action='store_true', help="List the runs (machine, OS build, date, duration, samples) and exit")
+    parser.add_argument('--where', action='append', metavar='KEY=PATTERN',
+        help="Only use the runs matching a wildcard pattern, KEY is one of " + ", ".join(runIndexAliases) + " (e.g. os=20D*), can be repeated")
+    parser.add_argument('--check', choices=['flag', 'drop', 'repair', 'off'], default='flag',
+        help="What to do with the samples failing the sanity checks (package >= clusters + DRAM + GPU, residencies in 0-100%%...): "
+            "flag only reports them, drop removes them, repair fixes what it can and drops the rest (default: flag)")
+    parser.add_argument('--power-tolerance', type=float, default=2, help="mW a power check may be off by before a sample fails it (default: 2)")
+    parser.add_argument('--no-cache', action='store_true', help="Always parse the logs from text and don't update the cache")
+    parser.add_argument('--invalidate-cache', action='store_true', help="Drop every cached log before parsing")
+    parser.add_argument('--cache-max-mb', type=float, default=256, help="Size limit of the parsed log cache (default: 256)")
+    parser.add_argument('--follow', metavar='LOG', help="Follow a powermetrics text log while it is being written and print running averages")
+    parser.add_argument('--poll-interval', type=float, default=1.0, help="Seconds between checks for new data with --follow (default: 1)")
+    parser.add_argument('--trace', metavar='PATH', help="Write the wall time, CPU time and peak allocation of every stage to a JSON trace")
+    parser.add_argument('--trace-summary', action='store_true', help="Print the time of every stage (log, figure, html and image write, export) at the end")
+    parser.add_argument('--trace-memory', action='store_true', help="Also trace the peak allocation of every stage with tracemalloc, slows the run down")
+    args = parser.parse_args()
+
+    # Workload windows given on the command line, checked before anything is parsed
+    knownWindows = {}
+    for window in args.workload_window or []:
+        try:
+            videoType, times = window.rsplit('=', 1)
+            start, end = (float(value) for value in times.split(':'))
+        except ValueError:
+            parser.error(f"--workload-window {window} is not VIDEO_TYPE=START:END with START and END in seconds")
+        if not 0 <= start < end:
+            parser.error(f"--workload-window {window} must start at 0 s or later and end after it starts")
+        knownWindows[videoType] = (start, end)
+    if args.idle_padding is not None and args.idle_padding < 0:
+        parser.error("--idle-padding can't be negative")
+
+    if args.follow:
+        followLog(args.follow, args.poll_interval)
+        return
+
+    # Queries only read the corpus database the other commands keep up to date, nothing is parsed
+    corpusPath = os.path.join(os.getcwd(), ".powermetric-cache", "corpus.sqlite")
+    if args.command == 'query':
+        if not args.sql:
+            parser.error("the query command needs an SQL query")
+        if not os.path.exists(corpusPath):
+            parser.error("there is no corpus database yet, run the parse command first")
+        start = time.perf_counter()
+        try:
+            dfResult = queryCorpus(corpusPath, args.sql)
+        except (sqlite3.Error, pd.errors.DatabaseError) as error:
+            parser.error(str(error))
+        print(dfResult.to_string(index=False))
+        print(f"({len(dfResult)} rows in {(time.perf_counter() - start) * 1000:.1f} ms)")
+        return
+    if args.sql:
+        parser.error("an SQL query is only taken by the query command")
+
+    if args.trace_memory:
+        tracemalloc.start()
     start_time = time.time()
-    print("Starting at = ", time.ctime(start_time))
+    traceOrigin()
     directory_path = os.getcwd()
 
     # Current directory should have a folder named powermetric-logs which contains the output logs of powermetric runs
     powerLogsFolderName = "powermetric-logs"
+    powerCacheFolderName = ".powermetric-cache"
 
     # Build the full path to the logs folder
     pathLogsFolder = directory_path + '/' + powerLogsFolderName + '/'
 
-    # Get the list of all log files in the logs folder
-    powerLogsList = os.listdir(pathLogsFolder)
-
-    # Create local dataframes
-    dfPower, dfFrequency, dfUsage = pd.DataFrame(), pd.DataFrame(), pd.DataFrame()
-
-    # Parse each log file
-    for logsFile in powerLogsList:
-
-        if not os.path.isfile(pathLogsFolder + logsFile): 
-            print('File does not exist.')
-        else:
-            file = open(pathLogsFolder + logsFile, 'r', encoding="utf8", errors='ignore')
-            content = file.read()
-        
-        if (logsFile.find('mp4') >= 0) or (logsFile.find('webm') >= 0):
-            # Transform 4K-AV1.mp4.txt -> 4K-AV1 because that's what we want in the charts
-            f_name = os.path.splitext(logsFile)[0]
-            videoType = str.split(f_name, '.')[0]
-        else:
-            # Used for file paths like Safari-VP9-HW.txt i.e. without the video container (mp4, webm)
-            videoType = os.path.splitext(logsFile)[0]
-
-        # Parse the content and build Data Frames
-        dfPowerTemp, dfFrequencyTemp, dfUsageTemp = regexParse(content, videoType)
-        dfPower     = pd.concat([dfPower, dfPowerTemp], ignore_index=True)
-        dfFrequency = pd.concat([dfFrequency, dfFrequencyTemp], ignore_index=True)
-        dfUsage     = pd.concat([dfUsage, dfUsageTemp], ignore_index=True)
-
-   # Common Plotly config parameter to be passed to each chart
-    config = dict({
-        'modeBarButtonsToRemove': ['toggleSpikelines', 'hoverClosestCartesian',  'hoverCompareCartesian', 'select2d', 'lasso2d'],
-        'displaylogo': False
-    })
-
-    # Logo file to add to the charts
-    kLogo = Image.open("favicon-97x98-white.png")
-
-    # Build charts and output the Excel file
-    buildVLCCharts(dfPower, dfFrequency, dfUsage, config, kLogo)
-    buildYouTubeCharts(dfPower, dfFrequency, dfUsage, config, kLogo)
-    buildNetflixCharts(dfPower, dfFrequency, dfUsage, config, kLogo)
-    outputExcel(dfPower, dfFrequency, dfUsage)
+    # Parsed logs are cached next to the logs folder, keyed by file path, size, mtime/content hash and parser version
+    cacheFolder = directory_path + '/' + powerCacheFolderName + '/'
+    if args.invalidate_cache:
+        invalidateCache(cacheFolder)
+
+    # Metadata of every run (machine, OS build, date, duration...) from the run index, only new or changed logs are scanned
+    with traceStage('run index'):
+        dfRuns = loadRunIndex(cacheFolder + 'runs.json', logPaths(pathLogsFolder))
+    if args.where:
+        try:
+            dfRuns = queryRuns(dfRuns, args.where)
+        except ValueError as error:
+            parser.error(str(error))
+    if args.list_runs:
+        print(dfRuns[['Video Type'] + list(runHeaderLabels) + ['Date', 'Duration (s)', 'Samples']].to_string(index=False))
+        return
+    if dfRuns.empty:
+        print("No runs to parse")
+        return
+    print("Starting at = ", time.ctime(start_time))
 
-    #print(dfPower)
+    # Parse every log, fanned out across the worker pool. Unchanged logs are loaded from the cache
+    with traceStage('parse', logs=len(dfRuns)):
+        dfSamples, dfSampleTimes, dfSummary, coreArray, histograms = loadLogs(pathLogsFolder, args.workers, None if args.no_cache else cacheFolder, dfRuns['path'],
+            args.check, args.power_tolerance)
+
+    # Per core samples and the seconds spent at each frequency, from the core array and the DVFS histograms
+    with traceStage('cores and histograms'):
+        dfCores = coreFrame(coreArray, dfSampleTimes)
+        dfTimeInState = timeInStateTable(histograms, dfSampleTimes)
+
+    if not args.no_cache:
+        pruneCache(cacheFolder, args.cache_max_mb * 1024 * 1024)
+        with traceStage('corpus database'):
+            storeCorpus(corpusPath, dfSamples, dfSampleTimes, dfCores, dfTimeInState, dfRuns, f"{args.check} {args.power_tolerance:g}")
+
+    if args.command == 'parse':
+        print(f"Parsed {len(dfRuns)} runs, {int(dfRuns['Samples'].sum())} samples")
+        finishRun(args, start_time)
+        return
+
+    # The charts and the per metric exports work on wide views of the long table
+    dfPower, dfFrequency, dfUsage = (sampleView(dfSamples, dfSampleTimes, metric) for metric in sampleMetrics)
+
+    # Split every run into phases (idle, load, idle, benchmark sub tests...) and annotate each sample with its phase
+    with traceStage('phases'):
+        phases = segmentPhases(dfPower, dfUsage if args.phase_residency else None, args.phase_penalty)
+        dfPower['phase'] = dfFrequency['phase'] = dfUsage['phase'] = phases
+        dfPhases = phaseStats(dfPower)
+    print(f"Found {len(dfPhases)} phases in {dfPhases['Video Type'].nunique()} runs")
+
+    # Energy used by the workload itself, without the idle time before and after it
+    if args.command != 'render':
+        for videoType in knownWindows.keys() - set(dfPower['Video Type']):
+            print(f"No run named {videoType} was loaded, its --workload-window is ignored")
+        with traceStage('workload energy'):
+            dfWorkload = workloadEnergy(dfPower, workloadWindows(dfPower, args.idle_padding, knownWindows))
+        print(dfWorkload[['Video Type', 'Start (s)', 'End (s)', 'Duration (s)', 'Package (J)', 'Package (J/s)']].to_string(index=False, float_format='%.1f'))
+
+    if args.command == 'summarize':
+        with traceStage('averages'):
+            dfAverages = runAverages(dfPower, dfFrequency, dfUsage)
+            # The package power powermetrics averaged itself in the summary block, next to the one from the samples
+            dfSummaryAverages = summaryAverages(dfSummary)
+            if 'Package (mW)' in dfSummaryAverages:
+                dfAverages = dfAverages.merge(dfSummaryAverages[['Video Type', 'Package (mW)']].rename(columns={'Package (mW)': 'Summary Package (mW)'}),
+                    on='Video Type', how='left')
+        print(dfAverages.to_string(index=False, float_format='%.1f'))
+        # Mean frequency while active of the clusters and the GPU, the per core ones are in the exported time in state table
+        dfActive = activeFrequencies(dfTimeInState[~dfTimeInState['histogram'].str.startswith('cpu ')])
+        print("Active frequency (MHz)")
+        print(dfActive.to_string(index=False, float_format='%.0f'))
+
+    if args.command in ('all', 'render'):
+        from PIL import Image
+
+        # Common Plotly config parameter to be passed to each chart
+        config = dict({
+            'modeBarButtonsToRemove': ['toggleSpikelines', 'hoverClosestCartesian',  'hoverCompareCartesian', 'select2d', 'lasso2d'],
+            'displaylogo': False
+        })
+
+        # Logo file to add to the charts
+        kLogo = Image.open("favicon-97x98-white.png")
+
+        # Build charts
+        chartManifestPath = "outputs/chart-manifest.json"
+        if args.rebuild_charts and os.path.exists(chartManifestPath):
+            os.remove(chartManifestPath)
+        with traceStage('charts'):
+            buildCharts(dfPower, dfFrequency, dfUsage, config, kLogo, workers=args.render_workers or args.workers, manifestPath=chartManifestPath,
+                downsample={'method': args.downsample, 'points': args.points_per_trace} if args.points_per_trace else None,
+                htmlMode=args.html)
+
+    # Export the parsed tables
+    if args.command in ('all', 'export'):
+        with traceStage('export tables'):
+            exportResults(exportTables(dfSamples, dfSampleTimes, dfPower, dfFrequency, dfUsage, dfSummary, dfWorkload, dfPhases,
+                dfCores, dfTimeInState, weightedFrequencies(histograms, dfSampleTimes)), args.export)
+
+    finishRun(args, start_time)
+
+def finishRun(args, start_time):
     end_time = time.time()
     print("Ending at = ", time.ctime(end_time))
     print(f"It took {end_time-start_time:.2f} Time (s) to compute")
 
+    if args.trace_summary:
+        printTraceSummary(stageTrace)
+    if args.trace:
+        storeJson(args.trace, {'started': start_time, 'wall': end_time - start_time, 'traceMemory': args.trace_memory, 'stages': stageTrace})
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file